@@ -3,9 +3,15 @@
 for help with the command line arguments."""
 
 from wuas.loader import load_from_file
+from wuas.output.abc import OutputError
 from wuas.validator import validate
 from wuas.config import ConfigFile
 from wuas.args import parse_and_interpret_args
+from wuas.processing.pipeline import run_processors
+from wuas.processing.scheduler import run_concurrently
+from wuas.processing.memo import ProcessorCache, MemoizedProcessor
+
+import sys
 
 if __name__ == "__main__":
     args = parse_and_interpret_args()
@@ -14,7 +20,23 @@ if __name__ == "__main__":
     if args.validate:
         validate(config, board)
 
-    for processor in args.board_processors:
-        processor.run(config, board)
+    board_processors = args.board_processors
+    if args.cache_dir is not None:
+        cache = ProcessorCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+        # Processors which cannot be memoized are left unwrapped, so
+        # that consecutive tile visitors among them can still share a
+        # traversal of the board. Memoized visitors run unfused.
+        board_processors = [
+            processor if processor.cache_key() is None else MemoizedProcessor(processor, cache)
+            for processor in board_processors
+        ]
+
+    if args.jobs > 1:
+        run_concurrently(config, board, board_processors, workers=args.jobs)
+    else:
+        run_processors(config, board, board_processors)
 
-    args.output_producer.produce_output_checked(config, board, args.original_args)
+    try:
+        args.output_producer.produce_output_checked(config, board, args.original_args)
+    except OutputError as exc:
+        sys.exit(f"error: {exc}")
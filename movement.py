@@ -1,10 +1,13 @@
 
 from wuas.movement import WuasTurn, WuasTurnEvaluator, WuasTurnParser
+from wuas.movement.cache import TurnCache, DirectoryCheckpointStore
 from wuas.movement.args import parse_and_interpret_args
 from wuas.validator import validate
 from wuas.config import ConfigFile
 from wuas.loader import load_from_file
 
+from typing import Iterable
+
 
 if __name__ == "__main__":
     args = parse_and_interpret_args()
@@ -16,10 +19,23 @@ if __name__ == "__main__":
     evaluator = WuasTurnEvaluator(board=board, config=config)
 
     turn_parser = WuasTurnParser(board=board, config=config)
+    turn_cache = TurnCache(args.cache_dir) if args.cache_dir else None
+    checkpoints = None
+    if args.cache_dir:
+        checkpoints = DirectoryCheckpointStore(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
     with open(args.turn_log_file, 'r') as f:
-        turn_data = turn_parser.parse(f.read())
-        for player_id, _ in config.definitions.all_players():
-            logs = evaluator.evaluate_turn(turn_data, player_id)
-            print(player_id)
-            for log_message in logs:
-                print(" * ", log_message, sep='')
+        turn_log = f.read()
+    turn_data = turn_parser.parse(turn_log, cache=turn_cache)
+    player_ids = [player_id for player_id, _ in config.definitions.all_players()]
+    if args.jobs > 1:
+        all_logs: Iterable[list[str]]
+        all_logs = evaluator.evaluate_turn_in_parallel(
+            turn_data, player_ids, workers=args.jobs, checkpoints=checkpoints,
+        )
+    else:
+        prepared_turn = evaluator.prepare_turn(turn_data, player_ids, checkpoints)
+        all_logs = (prepared_turn.evaluate(player_id) for player_id in player_ids)
+    for player_id, logs in zip(player_ids, all_logs):
+        print(player_id)
+        for log_message in logs:
+            print(" * ", log_message, sep='')
@@ -6,7 +6,10 @@ from __future__ import annotations
 from wuas.output import OutputProducer
 from wuas.output.registry import REGISTERED_PRODUCERS
 from wuas.processing import BoardProcessor
+from wuas.processing.abc import RandomizedProcessor
 from wuas.processing.registry import REGISTERED_PROCESSORS
+from wuas.processing.scope import Scope, ScopedProcessor
+from wuas.rng import RandomStreams
 
 from typing import Any
 import argparse
@@ -19,6 +22,9 @@ class Arguments:
     input_filename: str
     config_filename: str
     validate: bool
+    jobs: int
+    cache_dir: str | None
+    cache_size: int
     board_processors: list[BoardProcessor]
     output_producer: OutputProducer[Any]
 
@@ -34,6 +40,14 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('-c', '--config-filename', required=True)
     parser.add_argument('-i', '--input-filename', required=True)
     parser.add_argument('--validate', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes for running independent instructions concurrently')
+    parser.add_argument('--seed', type=int,
+                        help='Seed for the random choices made by instructions, for reproducible output')
+    parser.add_argument('--cache-dir',
+                        help='Directory in which to memoize the results of deterministic instructions')
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help='Maximum size of the --cache-dir directory, in megabytes')
     parser.add_argument('instructions', nargs='*')
 
     _make_output_subparsers(parser)
@@ -53,6 +67,8 @@ def interpret_args(namespace: argparse.Namespace) -> Arguments:
     input_filename = namespace.input_filename
 
     board_processors = [interpret_processor(instruction) for instruction in namespace.instructions]
+    if namespace.seed is not None:
+        seed_processors(board_processors, RandomStreams(namespace.seed))
     output_producer = interpret_output_producer(namespace.output_producer)
 
     return Arguments(
@@ -60,6 +76,9 @@ def interpret_args(namespace: argparse.Namespace) -> Arguments:
         config_filename=config_filename,
         input_filename=input_filename,
         validate=namespace.validate,
+        jobs=namespace.jobs,
+        cache_dir=namespace.cache_dir,
+        cache_size=namespace.cache_size,
         board_processors=board_processors,
         output_producer=output_producer,
     )
@@ -74,11 +93,36 @@ def interpret_output_producer(instruction: str) -> OutputProducer[Any]:
 
 
 def interpret_processor(instruction: str) -> BoardProcessor:
+    """The processor named by the instruction, confined to a scope if
+    the instruction has one (see wuas.processing.scope)."""
+    name, _, scope_text = instruction.partition('@')
     try:
-        return REGISTERED_PROCESSORS[instruction]()
+        processor = REGISTERED_PROCESSORS[name]()
     except KeyError:
         choices = ', '.join(sorted(REGISTERED_PROCESSORS.keys()))
-        raise ArgumentsError(f"Invalid board processor {instruction}, choices are {choices}") from None
+        raise ArgumentsError(f"Invalid board processor {name}, choices are {choices}") from None
+    if not scope_text:
+        return processor
+    try:
+        scope = Scope.parse(scope_text)
+    except ValueError as exc:
+        raise ArgumentsError(f"Invalid scope in instruction {instruction}: {exc}") from None
+    return ScopedProcessor(processor, scope)
+
+
+def seed_processors(board_processors: list[BoardProcessor], random_streams: RandomStreams) -> None:
+    """Give each randomized processor its own random streams, keyed
+    by its position in the list and its class, so that no two
+    instructions share a stream."""
+    for index, processor in enumerate(board_processors):
+        if isinstance(processor, ScopedProcessor):
+            processor = processor.processor
+        if isinstance(processor, RandomizedProcessor):
+            processor_class = type(processor)
+            processor.random_streams = random_streams.child(
+                index,
+                f"{processor_class.__module__}.{processor_class.__name__}",
+            )
 
 
 def parse_and_interpret_args() -> Arguments:
@@ -10,8 +10,9 @@ from wuas.util import indexif
 from wuas.floornumber import FloorNumber
 
 from dataclasses import dataclass
-from typing import Mapping, Sequence, Iterator, Union, overload
+from typing import Mapping, Sequence, Container, Callable, Iterator, Iterable, NamedTuple, Union, overload
 from functools import cached_property
+from collections import Counter, defaultdict
 
 
 class Board:
@@ -147,6 +148,14 @@ class Board:
         doesn't exist. Equivalent to `self.meta[key]`"""
         return self._meta[key]
 
+    def set_meta(self, key: str, value: str) -> None:
+        """Sets the metadata for the given key."""
+        self._meta[key] = value
+
+    def remove_meta(self, key: str) -> None:
+        """Removes the given key from the metadata table, if present."""
+        self._meta.pop(key, None)
+
     @property
     def meta(self) -> Mapping[str, str]:
         """The metadata mapping."""
@@ -176,6 +185,85 @@ class Board:
             # Has not been initialized yet, so nothing to do.
             pass
 
+    def replace_contents(self, other: Board) -> None:
+        """Replace everything on this board with the contents of other.
+        The two boards share their state afterward, so other should not
+        be used again."""
+        self._floors = other._floors
+        self._references = other._references
+        self._attributes = other._attributes
+        self._meta = other._meta
+        self._graph_edges = other._graph_edges
+        self.recompute_labels_map()
+
+    def relocate_tokens(self, moves: Iterable[TokenMove]) -> None:
+        """Apply a batch of token moves. Each move takes one instance of
+        the token with abbreviation ref off of src and places it on top
+        of the tokens at dest, or removes it from play if dest is None.
+
+        Every move is checked against the board as it was before the
+        batch, so a move cannot pick up a token which an earlier move
+        in the same batch put down. If any move is invalid, the board is
+        left unchanged: ValueError is raised if a token is not at its
+        source, and IndexError if a position is out of bounds.
+
+        Unlike repeated calls to move_token, this touches each tile
+        once, so it takes time linear in the number of moves and the
+        number of tokens on their source tiles."""
+        moves = list(moves)
+        removals: dict[tuple[int, int, FloorNumber], Counter[str]] = defaultdict(Counter)
+        for move in moves:
+            removals[move.src][move.ref] += 1
+            if move.dest is not None:
+                self._tile_data(move.dest)
+
+        remaining_token_ids: dict[tuple[int, int, FloorNumber], list[str]] = {}
+        for src, counts in removals.items():
+            remaining = []
+            for ref in self._tile_data(src).token_ids:
+                if counts[ref] > 0:
+                    counts[ref] -= 1
+                else:
+                    remaining.append(ref)
+            missing = [ref for ref, count in counts.items() if count > 0]
+            if missing:
+                raise ValueError(f"No instances of token {missing[0]} at position {src}")
+            remaining_token_ids[src] = remaining
+
+        for src, remaining in remaining_token_ids.items():
+            self._tile_data(src).token_ids = remaining
+        for move in moves:
+            if move.dest is not None:
+                self._tile_data(move.dest).token_ids.append(move.ref)
+
+    def map_space_names(
+            self,
+            mapping: Callable[[str], str] | Mapping[str, str],
+            where: Callable[[str], bool] | None = None,
+    ) -> None:
+        """Floor.map_space_names on every floor of the board."""
+        for floor in self.floors.values():
+            floor.map_space_names(mapping, where)
+
+    def token_positions(self, refs: Container[str]) -> list[tuple[str, tuple[int, int, FloorNumber]]]:
+        """Every occurrence of any of the given token abbreviations on
+        the board, as (ref, position) pairs. The pairs are ordered as
+        in indices, and by order on the space within each position."""
+        result = []
+        for z, floor_grid in sorted(self._floors.items(), key=lambda item: item[0]):
+            for y, row in enumerate(floor_grid):
+                for x, tile in enumerate(row):
+                    for ref in tile.token_ids:
+                        if ref in refs:
+                            result.append((ref, (x, y, z)))
+        return result
+
+    def _tile_data(self, pos: tuple[int, int, FloorNumber]) -> TileData:
+        x, y, z = pos
+        if not self.in_bounds(x, y, z):
+            raise IndexError(f"Position {pos} out of bounds in board of size {(self.width, self.height)}")
+        return self._floors[z][y][x]
+
 
 class Floor:
     """A floor of the board, which contains a two-dimensional grid of spaces
@@ -233,12 +321,19 @@ class Floor:
             left = [TileData(initial_value, [], []) for _ in range(new_left)]
             right = [TileData(initial_value, [], []) for _ in range(new_right)]
             self._data[y] = left + self._data[y] + right
-        # Top
-        for _ in range(new_top):
-            self._data.insert(0, [TileData(initial_value, [], []) for _ in range(self.width)])
-        # Bottom
-        for _ in range(new_bottom):
-            self._data.append([TileData(initial_value, [], []) for _ in range(self.width)])
+        # Top and Bottom (assigned in place, since the board shares this
+        # list, and all at once, so that padding is linear in the size
+        # of the new floor)
+        width = self.width
+        self._data[:0] = [[TileData(initial_value, [], []) for _ in range(width)] for _ in range(new_top)]
+        self._data.extend([TileData(initial_value, [], []) for _ in range(width)] for _ in range(new_bottom))
+
+    def reverse_rows(self) -> None:
+        """Reverse each row of the floor in place, mirroring it
+        horizontally. Tiles are moved, not copied, so tokens and
+        attributes move with their spaces."""
+        for row in self._data:
+            row.reverse()
 
     def get_space(self, x: int, y: int) -> Space:
         """Return the space at the given position. This is a live view,
@@ -263,6 +358,115 @@ class Floor:
         """The mapping from (x, y) coordinates to TileData objects."""
         return TileMapping(self, self._data)
 
+    def fill_rect(self, left: int, top: int, width: int, height: int, space_name: str) -> None:
+        """Set the space type of every position in the given rectangle,
+        which must lie entirely within the floor. Tokens and attributes
+        are unaffected."""
+        if left < 0 or top < 0 or width < 0 or height < 0 or left + width > self.width or top + height > self.height:
+            raise IndexError(f"Rectangle {(left, top, width, height)} out of bounds in floor of size "
+                             f"{(self.width, self.height)}")
+        for row in self._data[top:top + height]:
+            for tile in row[left:left + width]:
+                tile.space_name = space_name
+
+    def ring_positions(self, thickness: int = 1) -> list[tuple[int, int]]:
+        """The positions within the given distance of the edge of the
+        floor, each listed once, in row-major order."""
+        positions: list[tuple[int, int]] = []
+        for y in range(self.height):
+            if y < thickness or y >= self.height - thickness:
+                positions.extend((x, y) for x in range(self.width))
+            else:
+                positions.extend((x, y) for x in range(min(thickness, self.width)))
+                positions.extend((x, y) for x in range(max(self.width - thickness, thickness), self.width))
+        return positions
+
+    def fill_ring(self, space_name: str, thickness: int = 1) -> None:
+        """Set the space type of every position within the given
+        distance of the edge of the floor. Tokens and attributes are
+        unaffected."""
+        for x, y in self.ring_positions(thickness):
+            self._data[y][x].space_name = space_name
+
+    def map_space_names(
+            self,
+            mapping: Callable[[str], str] | Mapping[str, str],
+            where: Callable[[str], bool] | TileMask | None = None,
+    ) -> None:
+        """Replace the space type of each position by applying mapping
+        to it. The mapping can be a function or a lookup table; space
+        types which are not in a lookup table are left alone. Space
+        types are normalized (see normalize_space_name) before being
+        passed in. A position whose space type is mapped to itself is
+        left exactly as it was, so a blank ('') space stays blank rather
+        than being rewritten as 'gap'.
+
+        If where is given, only positions where it holds are affected.
+        It can be a predicate on the (normalized) space type, or a mask
+        with one boolean per position, indexed [y][x]."""
+        if isinstance(mapping, Mapping):
+            table = mapping
+
+            def mapping(name: str) -> str:
+                return table.get(name, name)
+
+        if where is None or callable(where):
+            predicate = where
+            for row in self._data:
+                for tile in row:
+                    name = normalize_space_name(tile.space_name)
+                    if predicate is None or predicate(name):
+                        new_name = mapping(name)
+                        if new_name != name:
+                            tile.space_name = new_name
+        else:
+            for row, mask_row in zip(self._data, where):
+                for tile, selected in zip(row, mask_row):
+                    if selected:
+                        name = normalize_space_name(tile.space_name)
+                        new_name = mapping(name)
+                        if new_name != name:
+                            tile.space_name = new_name
+
+    def clear_tokens(self, mask: TileMask) -> None:
+        """Remove every token from each position where the mask, which
+        has one boolean per position indexed [y][x], is true."""
+        for row, mask_row in zip(self._data, mask):
+            for tile, selected in zip(row, mask_row):
+                if selected:
+                    tile.token_ids = []
+
+    def clear_attributes(self, mask: TileMask) -> None:
+        """Remove every attribute from each position where the mask,
+        which has one boolean per position indexed [y][x], is true."""
+        for row, mask_row in zip(self._data, mask):
+            for tile, selected in zip(row, mask_row):
+                if selected:
+                    tile.attribute_ids = []
+
+    def reset_tiles(self, mask: TileMask, space_name: str) -> None:
+        """Replace each position where the mask is true with a bare
+        space of the given type, with no tokens or attributes. Space
+        labels are kept. Equivalent to map_space_names, clear_tokens,
+        and clear_attributes with the same mask, in a single pass."""
+        for row, mask_row in zip(self._data, mask):
+            for tile, selected in zip(row, mask_row):
+                if selected:
+                    tile.space_name = space_name
+                    tile.token_ids = []
+                    tile.attribute_ids = []
+
+    @property
+    def rows(self) -> Sequence[Sequence[TileData]]:
+        """The rows of this floor, in order from top to bottom. Each
+        row is a sequence of TileData objects from left to right.
+
+        This is intended for bulk read-only traversals, such as output
+        producers, which would otherwise pay for a bounds check and a
+        Space wrapper on every tile. The TileData objects are live, but
+        the row sequences themselves should not be mutated."""
+        return self._data
+
 
 class TileMapping:
     _floor: Floor
@@ -333,6 +537,14 @@ class TileData:
     space_label: str | None = None
 
 
+class TokenMove(NamedTuple):
+    """A single move for Board.relocate_tokens. The token is identified
+    by its abbreviation (a key in board.tokens), not by its name."""
+    ref: str
+    src: tuple[int, int, FloorNumber]
+    dest: tuple[int, int, FloorNumber] | None
+
+
 class Space:
     """A space on the board, consisting of a space type and zero or
     more tokens. This is a live reference to a Board, and changes to
@@ -446,6 +658,10 @@ class Space:
 
 Token = Union['ConcreteToken', 'HiddenToken']
 
+# One boolean per position of a floor, indexed [y][x]. NumPy boolean
+# arrays of shape (height, width) also work.
+TileMask = Sequence[Sequence[bool]]
+
 
 @dataclass(frozen=True)
 class ConcreteToken:
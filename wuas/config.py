@@ -43,6 +43,12 @@ class ConfigFile:
         with open(filename, 'r') as json_file:
             return cls(json.load(json_file))
 
+    def fingerprint(self) -> str:
+        """A string which identifies the contents of this configuration
+        and of the definitions file it references. Two configurations
+        with the same fingerprint are interchangeable."""
+        return json.dumps([self._json_data, self.definitions._json_data], sort_keys=True)
+
     @cached_property
     def definitions(self) -> DefinitionsFile:
         """The definitions file which provides descriptions of effects."""
@@ -82,6 +88,11 @@ class DefinitionsFile:
         with open(filename, 'r') as json_file:
             return cls(json.load(json_file))
 
+    def fingerprint(self) -> str:
+        """A string which identifies the contents of this definitions
+        file."""
+        return json.dumps(self._json_data, sort_keys=True)
+
     def has_raw_space(self, key: str) -> bool:
         """Returns true if the space with the given name exists. This
         function performs space name normalization with normalize_space_name."""
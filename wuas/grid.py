@@ -0,0 +1,105 @@
+
+"""Dense integer encodings of the spaces on a floor, for processors
+which operate on a whole floor at once using NumPy arrays rather than
+visiting one Space at a time."""
+
+from __future__ import annotations
+
+from wuas.board import Floor
+from wuas.config import normalize_space_name
+
+from typing import Iterable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+type IntGrid = npt.NDArray[np.int32]
+type BoolGrid = npt.NDArray[np.bool_]
+
+# (dx, dy) offsets of the eight spaces surrounding a space.
+MOORE_NEIGHBORHOOD: tuple[tuple[int, int], ...] = (
+    (-1, -1), (0, -1), (1, -1),
+    (-1, 0), (1, 0),
+    (-1, 1), (0, 1), (1, 1),
+)
+
+# (dx, dy) offsets of the four orthogonally adjacent spaces.
+VON_NEUMANN_NEIGHBORHOOD: tuple[tuple[int, int], ...] = (
+    (0, -1), (-1, 0), (1, 0), (0, 1),
+)
+
+
+class SpacePalette:
+    """A bidirectional mapping between (normalized) space names and
+    small integer codes. New names are assigned codes on demand, so a
+    single palette can be shared across all floors of a board."""
+
+    _names: list[str]
+    _codes: dict[str, int]
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self._names = []
+        self._codes = {}
+        for name in names:
+            self.code(name)
+
+    def code(self, name: str) -> int:
+        """The code for the given space name, after normalizing with
+        normalize_space_name. Assigns a new code if the name has not
+        been seen before."""
+        name = normalize_space_name(name)
+        try:
+            return self._codes[name]
+        except KeyError:
+            code = self._codes[name] = len(self._names)
+            self._names.append(name)
+            return code
+
+    def name(self, code: int) -> str:
+        """The space name for the given code. Raises IndexError if the
+        code has not been assigned."""
+        return self._names[code]
+
+    @property
+    def names(self) -> Sequence[str]:
+        """Every name in the palette, in order of code."""
+        return self._names
+
+    def codes(self, names: Iterable[str]) -> list[int]:
+        return [self.code(name) for name in names]
+
+    def encode(self, floor: Floor) -> IntGrid:
+        """Encode the space names of the floor as a (height, width)
+        array of codes."""
+        code = self.code
+        data = [[code(tile.space_name) for tile in row] for row in floor.rows]
+        return np.array(data, dtype=np.int32).reshape(floor.height, floor.width)
+
+    def decode_into(self, floor: Floor, new_grid: IntGrid, old_grid: IntGrid) -> None:
+        """Write the space names from new_grid back to the floor. Only
+        positions where new_grid differs from old_grid (which should be
+        the result of encode on the same floor) are touched."""
+        rows = floor.rows
+        for y, x in zip(*np.nonzero(new_grid != old_grid)):
+            rows[y][x].space_name = self._names[new_grid[y, x]]
+
+    def mask(self, grid: IntGrid, names: Iterable[str]) -> BoolGrid:
+        """A boolean array which is true wherever grid contains any of
+        the given space names."""
+        return np.isin(grid, self.codes(names))
+
+
+def count_neighbors(
+        mask: BoolGrid,
+        neighborhood: Sequence[tuple[int, int]] = MOORE_NEIGHBORHOOD,
+) -> IntGrid:
+    """For each position, count the positions in the given
+    neighborhood for which mask is true. Positions outside the grid
+    are never counted."""
+    height, width = mask.shape
+    radius = max((max(abs(dx), abs(dy)) for dx, dy in neighborhood), default=0)
+    padded = np.pad(mask, radius).astype(np.int32)
+    result = np.zeros((height, width), dtype=np.int32)
+    for dx, dy in neighborhood:
+        result += padded[radius + dy:radius + dy + height, radius + dx:radius + dx + width]
+    return result
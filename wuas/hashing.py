@@ -0,0 +1,38 @@
+
+"""Content hashes of boards, for caches which are keyed by the exact
+state of a board."""
+
+from __future__ import annotations
+
+from wuas.board import Board
+from wuas.config import normalize_space_name
+
+import hashlib
+
+
+def board_hash(board: Board) -> str:
+    """A hex digest which identifies the contents of the board: its
+    metadata, every tile of every floor, and the token, attribute, and
+    graph tables. Space names are normalized, so the hash is stable
+    across a round trip through the datafile format."""
+    digest = hashlib.sha256()
+
+    def feed(value: object) -> None:
+        # Every component is built from strings, integers, tuples,
+        # lists, None, and frozen dataclasses thereof, whose reprs are
+        # unambiguous.
+        digest.update(repr(value).encode('utf-8'))
+        digest.update(b'\n')
+
+    feed(list(board.meta.items()))
+    for z, floor in board.floors.items():
+        feed(z.name)
+        for row in floor.rows:
+            feed([
+                (normalize_space_name(tile.space_name), tile.token_ids, tile.attribute_ids, tile.space_label)
+                for tile in row
+            ])
+    feed(list(board.tokens.items()))
+    feed(list(board.attributes.items()))
+    feed(board.graph_edges)
+    return digest.hexdigest()
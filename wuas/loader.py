@@ -8,6 +8,9 @@ from wuas.floornumber import FloorNumber
 from wuas.graph import GraphEdge
 
 from typing import TextIO, NamedTuple
+from dataclasses import dataclass
+from io import StringIO
+from weakref import WeakKeyDictionary
 import re
 
 
@@ -16,12 +19,38 @@ KNOWN_VERSIONS = (1, 2, 3, 4, 5)
 SPACE_LABEL_MARKER = '&'
 
 
+# The sections of each board loaded by load_from_file.
+_LOADED_SECTIONS: WeakKeyDictionary[Board, DatafileSections] = WeakKeyDictionary()
+
+
 def load_from_file(filename: str) -> Board:
+    """Load a board from a datafile. For datafiles in a version with
+    floors (3 and up), the original text of the file and the location
+    of each of its sections are recorded as it is loaded, so that the
+    board can be written back with only its changed sections rewritten
+    (see loaded_sections)."""
     with open(filename, 'r') as input_file:
-        return load_from_io(input_file)
+        text = input_file.read()
+    io = StringIO(text)
+    recorder = _SectionRecorder(io)
+    board = _load(io, recorder)
+    if recorder.version is not None and recorder.version >= 3:
+        _LOADED_SECTIONS[board] = recorder.sections(text, board)
+    return board
 
 
 def load_from_io(io: TextIO) -> Board:
+    return _load(io, None)
+
+
+def loaded_sections(board: Board) -> DatafileSections | None:
+    """The sections of the datafile which the board was loaded from,
+    or None if it was not loaded by load_from_file (or the datafile
+    predates floors)."""
+    return _LOADED_SECTIONS.get(board)
+
+
+def _load(io: TextIO, recorder: _SectionRecorder | None) -> Board:
     # Ignore leading comments and the blank line after them.
     while io.readline().startswith("#"):
         pass
@@ -30,6 +59,9 @@ def load_from_io(io: TextIO) -> Board:
     version = int(io.readline())
     if version not in KNOWN_VERSIONS:
         raise RuntimeError(f"Invalid version number {version}")
+    if recorder is not None:
+        recorder.version = version
+        recorder.mark('preamble')
 
     if version == 1:
         # Version 1 parses no metadata
@@ -37,24 +69,36 @@ def load_from_io(io: TextIO) -> Board:
     else:
         # Versions > 1 parse key-value pairs until it hits a newline
         meta = _read_meta(io)
+    if recorder is not None:
+        recorder.mark('meta')
 
-    floors = _read_floors(io, version)
+    floors = _read_floors(io, version, recorder)
     token_data = _read_tokens(io, version)
+    if recorder is not None:
+        recorder.mark('tokens')
 
     if version >= 3:
         attr_data = _read_attrs(io)
     else:
         attr_data = {}
+    if recorder is not None:
+        recorder.mark('attributes')
 
     if version >= 4:
         graph_data = _read_graph(io)
     else:
         graph_data = []
+    if recorder is not None:
+        recorder.mark('graph')
 
     return Board(floors, token_data, attr_data, meta, graph_data)
 
 
-def _read_floors(io: TextIO, version: int) -> dict[FloorNumber, list[list[TileData]]]:
+def _read_floors(
+        io: TextIO,
+        version: int,
+        recorder: _SectionRecorder | None = None,
+) -> dict[FloorNumber, list[list[TileData]]]:
     if version < 3:
         # Versions 1 and 2 don't have floors, so put everything on floor 0.
         board_table = _read_board(io, version)
@@ -68,6 +112,8 @@ def _read_floors(io: TextIO, version: int) -> dict[FloorNumber, list[list[TileDa
             header_line = io.readline()
             if header_line == '\n':
                 # No more floors, stop reading
+                if recorder is not None:
+                    recorder.mark('floors_end')
                 return floors
             if not header_line.startswith("floor="):
                 raise RuntimeError(f"Expecting floor number, got '{header_line}'")
@@ -76,6 +122,8 @@ def _read_floors(io: TextIO, version: int) -> dict[FloorNumber, list[list[TileDa
                 raise RuntimeError(f"Duplicate floor {floor_number}")
             board_table = _read_board(io, version)
             floors[floor_number] = board_table
+            if recorder is not None:
+                recorder.mark(floor_number)
 
 
 def _read_board(io: TextIO, version: int) -> list[list[TileData]]:
@@ -196,3 +244,86 @@ def _parse_space(space: str, version: int) -> SpaceParseResult:
 class SpaceParseResult(NamedTuple):
     space_name: str
     attributes: list[str]
+
+
+@dataclass(frozen=True)
+class DatafileSections:
+    """The original text of a datafile, the location of each of its
+    sections, and the contents of the board as it was loaded, recorded
+    by load_from_file. Every section is given as a (start, end) pair
+    of character offsets into text, and includes the blank line which
+    terminates it (if present)."""
+    text: str
+    version: int
+    # Leading comments, the blank line after them, and the version
+    # number.
+    preamble: tuple[int, int]
+    meta: tuple[int, int]
+    # Each floor includes its "floor=" header line.
+    floors: dict[FloorNumber, tuple[int, int]]
+    # The blank line after the last floor.
+    floors_end: tuple[int, int]
+    tokens: tuple[int, int]
+    attributes: tuple[int, int]
+    graph: tuple[int, int]
+    # A copy of the board as loaded, which is never modified, so that a
+    # section can be reused if the board's contents still match it.
+    original: Board
+
+    def source(self, span: tuple[int, int]) -> str:
+        """The original text of the given section."""
+        start, end = span
+        return self.text[start:end]
+
+
+class _SectionRecorder:
+    # Records the span of each section as it is read. The offsets come
+    # from StringIO.tell, which counts characters.
+    _io: StringIO
+    _last: int
+    _spans: dict[str | FloorNumber, tuple[int, int]]
+    version: int | None
+
+    def __init__(self, io: StringIO) -> None:
+        self._io = io
+        self._last = 0
+        self._spans = {}
+        self.version = None
+
+    def mark(self, section: str | FloorNumber) -> None:
+        """The section which began at the end of the previous one ends
+        at the current position."""
+        position = self._io.tell()
+        self._spans[section] = (self._last, position)
+        self._last = position
+
+    def sections(self, text: str, board: Board) -> DatafileSections:
+        assert self.version is not None
+        return DatafileSections(
+            text=text,
+            version=self.version,
+            preamble=self._spans['preamble'],
+            meta=self._spans['meta'],
+            floors={z: span for z, span in self._spans.items() if isinstance(z, FloorNumber)},
+            floors_end=self._spans['floors_end'],
+            tokens=self._spans['tokens'],
+            attributes=self._spans['attributes'],
+            graph=self._spans['graph'],
+            original=_copy_board(board),
+        )
+
+
+def _copy_board(board: Board) -> Board:
+    # Tokens, attributes, and graph edges are immutable, so only the
+    # tiles need to be copied.
+    floors = {
+        z: [
+            [
+                TileData(tile.space_name, list(tile.token_ids), list(tile.attribute_ids), tile.space_label)
+                for tile in row
+            ]
+            for row in floor.rows
+        ]
+        for z, floor in board.floors.items()
+    }
+    return Board(floors, dict(board.tokens), dict(board.attributes), dict(board.meta), list(board.graph_edges))
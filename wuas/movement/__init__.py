@@ -1,19 +1,23 @@
+from __future__ import annotations
 
 from .turn import WuasTurn
 from .singleplayer import SinglePlayerBoard
-from .events import EventState
+from .events import EventState, SharedEventState, PlayerEffect
 from .logs import MessageLogger
 from .names import ObjectNamer, ConfigObjectNamer
 from .parser import WuasTurnParser
+from .checkpoint import Checkpoint, CheckpointStore, TurnKeys
 from wuas.config import ConfigFile
 from wuas.board import Board
 
-from attrs import define
+from attrs import define, field
 from copy import deepcopy
+from typing import Sequence, NamedTuple
+from concurrent.futures import ProcessPoolExecutor
 
 
 __all__ = (
-    'WuasTurnEvaluator',
+    'WuasTurnEvaluator', 'PreparedTurn',
     'WuasTurn', 'WuasTurnParser',
     'SinglePlayerBoard', 'EventState',
 )
@@ -25,25 +29,170 @@ class WuasTurnEvaluator:
     _board: Board
 
     def evaluate_turn(self, turn: WuasTurn, player_id: str) -> list[str]:
-        local_board = SinglePlayerBoard(
-            board=deepcopy(self._board),
-            player_id=player_id,
-        )
-        logger = MessageLogger()
-        state = EventState(
-            logger=logger,
-            board=local_board,
+        return self.prepare_turn(turn, [player_id]).evaluate(player_id)
+
+    def prepare_turn(
+            self,
+            turn: WuasTurn,
+            player_ids: Sequence[str],
+            checkpoints: CheckpointStore | None = None,
+    ) -> PreparedTurn:
+        """Prepare the turn to be evaluated for each of the given
+        players.
+
+        If a checkpoint store is given, each player's state is saved
+        to it after each segment of the turn which applies to them,
+        and each player's evaluation resumes from their latest saved
+        state, if any (see wuas.movement.checkpoint)."""
+        return PreparedTurn(
             config=self._config,
-            namer=self.namer,
+            board=self._board,
+            turn=turn,
+            player_ids=player_ids,
+            checkpoints=checkpoints,
         )
-        for event in turn.filtered_events(player_id=player_id):
-            event.execute(state)
-        return list(logger.messages())
+
+    def evaluate_turn_in_parallel(
+            self,
+            turn: WuasTurn,
+            player_ids: Sequence[str],
+            workers: int,
+            checkpoints: CheckpointStore | None = None,
+    ) -> list[list[str]]:
+        """Evaluate the turn for each of the given players, using a
+        pool of worker processes. The logs are returned in the same
+        order as player_ids.
+
+        The board, the configuration, and the turn are sent to each
+        worker once, and each worker evaluates the turn's shared
+        prefix for itself."""
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self._board, self._config, turn, player_ids, checkpoints),
+        )
+        with pool:
+            return list(pool.map(_evaluate_player_turn, player_ids))
 
     @property
     def namer(self) -> ObjectNamer:
         return ConfigObjectNamer(self._config)
 
 
+@define(eq=False)
+class PreparedTurn:
+    """A turn prepared for evaluation for a group of players.
+
+    The global events at the start of the turn (see
+    WuasTurn.split_shared_prefix) are evaluated only once, on a single
+    copy of the board shared by the whole group, the first time a
+    player without a checkpoint is evaluated. Each player then
+    continues on their own copy of the shared board."""
+    _config: ConfigFile
+    _board: Board
+    _turn: WuasTurn
+    _player_ids: Sequence[str]
+    _checkpoints: CheckpointStore | None = None
+    _shared_prefix: _SharedPrefix | None = field(default=None, init=False)
+    _turn_keys: TurnKeys | None = field(default=None, init=False)
+
+    def evaluate(self, player_id: str) -> list[str]:
+        """Evaluate the turn for the given player."""
+        player_keys = self._player_keys(player_id)
+        resumed = self._resume(player_id, player_keys)
+        if resumed is not None:
+            state, start = resumed
+            segments = list(self._turn)[start:]
+        else:
+            state, rest = self._start(player_id)
+            segments = list(rest)
+            # The rest of the turn may begin partway through a segment,
+            # which finishes at the same point as it would have in the
+            # whole turn.
+            start = len(list(self._turn)) - len(segments)
+        for index, segment in enumerate(segments, start=start):
+            if not segment.key.applies_to(player_id):
+                continue
+            for event in segment.events:
+                event.execute(state)
+            if self._checkpoints is not None and player_keys is not None:
+                self._checkpoints.store(player_keys[index + 1], Checkpoint.capture(state))
+        return list(state.logger.messages())
+
+    def _player_keys(self, player_id: str) -> Sequence[str] | None:
+        if self._checkpoints is None:
+            return None
+        if self._turn_keys is None:
+            self._turn_keys = TurnKeys(self._config, self._board, self._turn)
+        return self._turn_keys.player_keys(player_id)
+
+    def _resume(self, player_id: str, player_keys: Sequence[str] | None) -> tuple[EventState, int] | None:
+        # The player's state after the latest segment which has a
+        # checkpoint, and the index of the segment after it.
+        if self._checkpoints is None or player_keys is None:
+            return None
+        for index in range(len(player_keys) - 1, 0, -1):
+            checkpoint = self._checkpoints.load(player_keys[index])
+            if checkpoint is not None:
+                return checkpoint.restore(player_id, ConfigObjectNamer(self._config), self._config), index
+        return None
+
+    def _start(self, player_id: str) -> tuple[EventState, WuasTurn]:
+        # The player's state after the shared prefix, and the rest of
+        # the turn.
+        shared_prefix = self._evaluate_shared_prefix()
+        state = EventState(
+            logger=MessageLogger(),
+            board=SinglePlayerBoard(board=deepcopy(shared_prefix.board), player_id=player_id),
+            config=self._config,
+            namer=ConfigObjectNamer(self._config),
+        )
+        for player_effect in shared_prefix.player_effects:
+            player_effect(state)
+        return state, shared_prefix.rest
+
+    def _evaluate_shared_prefix(self) -> _SharedPrefix:
+        if self._shared_prefix is None:
+            shared_events, rest = self._turn.split_shared_prefix()
+            shared_state = SharedEventState(
+                board=deepcopy(self._board),
+                player_ids=self._player_ids,
+                namer=ConfigObjectNamer(self._config),
+                config=self._config,
+            )
+            player_effects = [event.execute_shared(shared_state) for event in shared_events]
+            self._shared_prefix = _SharedPrefix(shared_state.board, player_effects, rest)
+        return self._shared_prefix
+
+
+class _SharedPrefix(NamedTuple):
+    """The shared board after a turn's shared prefix, the per-player
+    parts of the prefix's events, in order, and the rest of the
+    turn."""
+    board: Board
+    player_effects: Sequence[PlayerEffect]
+    rest: WuasTurn
+
+
 class NoSuchPlayerError(Exception):
     pass
+
+
+_worker_turn: PreparedTurn | None = None
+
+
+def _init_worker(
+        board: Board,
+        config: ConfigFile,
+        turn: WuasTurn,
+        player_ids: Sequence[str],
+        checkpoints: CheckpointStore | None,
+) -> None:
+    global _worker_turn
+    _worker_turn = WuasTurnEvaluator(board=board, config=config).prepare_turn(turn, player_ids, checkpoints)
+
+
+def _evaluate_player_turn(player_id: str) -> list[str]:
+    # Runs in a worker process.
+    assert _worker_turn is not None, "Worker process was not initialized"
+    return _worker_turn.evaluate(player_id)
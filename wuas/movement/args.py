@@ -13,6 +13,9 @@ class Arguments:
     input_filename: str
     config_filename: str
     validate: bool
+    jobs: int
+    cache_dir: str | None
+    cache_size: int
     turn_log_file: str
 
 
@@ -23,6 +26,12 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('-c', '--config-filename', required=True)
     parser.add_argument('-i', '--input-filename', required=True)
     parser.add_argument('--validate', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes for evaluating players\' turns concurrently')
+    parser.add_argument('--cache-dir',
+                        help='Directory in which to cache parsed turn logs and checkpoints of players\' turns')
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help='Maximum size of the checkpoints in the --cache-dir directory, in megabytes')
     parser.add_argument('turn_log_file')
 
     return parser.parse_args()
@@ -34,6 +43,9 @@ def interpret_args(namespace: argparse.Namespace) -> Arguments:
         input_filename=namespace.input_filename,
         config_filename=namespace.config_filename,
         validate=namespace.validate,
+        jobs=namespace.jobs,
+        cache_dir=namespace.cache_dir,
+        cache_size=namespace.cache_size,
         turn_log_file=namespace.turn_log_file,
     )
 
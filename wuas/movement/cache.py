@@ -0,0 +1,147 @@
+
+"""Caching of parsed turn logs. A parsed and validated WuasTurn is
+stored in a cache directory, keyed by a hash of the text of the turn
+log and of the definitions file it was validated against. Parsing the
+same turn log again loads the stored turn rather than parsing and
+validating it again, and editing the definitions file invalidates
+every stored turn automatically.
+
+Checkpoints of players' turns (see wuas.movement.checkpoint) can be
+stored in the same directory, so that re-evaluating a turn log which
+has grown since the last run resumes from where that run left off.
+A checkpoint is saved for each player after each segment, so they
+accumulate quickly; their total size is bounded, and the least
+recently used are evicted."""
+
+from __future__ import annotations
+
+from wuas.movement.turn import WuasTurn
+from wuas.movement.checkpoint import Checkpoint, CheckpointStore
+from wuas.config import ConfigFile
+
+from pathlib import Path
+from typing import Any
+import gzip
+import hashlib
+import json
+import os
+import pickle
+
+TURN_CACHE_FORMAT_VERSION = 1
+
+DEFAULT_MAX_CHECKPOINT_BYTES = 256 * 1024 * 1024
+
+
+class TurnCache:
+    """A directory of parsed turns, one compressed pickle per turn.
+    The cache directory is trusted, since its files are unpickled."""
+    _directory: Path
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self._directory = Path(directory)
+
+    def path(self, key: str) -> Path:
+        return self._directory / f"{key}.turn.gz"
+
+    def load(self, key: str) -> WuasTurn | None:
+        """The turn stored under the given key, or None if there is
+        none (or it cannot be read)."""
+        turn = _load_pickle(self.path(key))
+        if not isinstance(turn, WuasTurn):
+            return None
+        return turn
+
+    def store(self, key: str, turn: WuasTurn) -> None:
+        """Save the turn under the given key, creating the cache
+        directory if necessary."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        _store_pickle(self.path(key), turn)
+
+
+class DirectoryCheckpointStore(CheckpointStore):
+    """A CheckpointStore which keeps checkpoints in a directory, one
+    compressed pickle per checkpoint. When the checkpoints grow beyond
+    max_bytes, the least recently used are evicted. The directory is
+    trusted, since its files are unpickled."""
+    _directory: Path
+    _max_bytes: int
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int = DEFAULT_MAX_CHECKPOINT_BYTES) -> None:
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+
+    def path(self, key: str) -> Path:
+        return self._directory / f"{key}.checkpoint.gz"
+
+    def load(self, key: str) -> Checkpoint | None:
+        path = self.path(key)
+        checkpoint = _load_pickle(path)
+        if not isinstance(checkpoint, Checkpoint):
+            return None
+        # Mark the entry as recently used. Another worker may have
+        # evicted it in the meantime, which is harmless now that it has
+        # been read.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return checkpoint
+
+    def store(self, key: str, checkpoint: Checkpoint) -> None:
+        """Save the checkpoint under the given key, creating the
+        directory if necessary, and evict old checkpoints if there are
+        now too many."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        _store_pickle(self.path(key), checkpoint)
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used checkpoints until they fit
+        within the size bound."""
+        entries = []
+        for path in self._directory.glob("*.checkpoint.gz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+
+def turn_cache_key(config: ConfigFile, turn_log: str) -> str:
+    """The key under which the turn parsed from the given turn log is
+    cached. Parsing depends only on the definitions file (which
+    determines the valid player IDs), not on the board or the rest of
+    the configuration."""
+    key_data = json.dumps([
+        TURN_CACHE_FORMAT_VERSION,
+        turn_log,
+        config.definitions.fingerprint(),
+    ])
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+def _load_pickle(path: Path) -> Any:
+    try:
+        with gzip.open(path, 'rb') as input_file:
+            return pickle.load(input_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        # A partially-written entry, or one written by an older version
+        # of the events module, is no worse than a missing one.
+        return None
+
+
+def _store_pickle(path: Path, value: Any) -> None:
+    # Write to a temporary file first, so that a concurrent reader
+    # never sees a partial entry.
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with gzip.open(temp_path, 'wb') as output_file:
+        pickle.dump(value, output_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
@@ -0,0 +1,121 @@
+
+"""Checkpoints of a player's turn, for incremental re-evaluation.
+
+While a turn is evaluated for a player, the player's EventState (their
+board, the event metadata, and the messages logged so far) is saved
+after each segment of the turn which applies to them. Each checkpoint
+is keyed by a hash chained over the initial board, the configuration,
+the player, and every segment of the turn up to that point. So when a
+turn log is only extended, the keys of its existing segments are
+unchanged, and the player's evaluation resumes from the last
+checkpoint rather than from the initial board. Editing an earlier
+segment changes the key of every later checkpoint, so no stale state
+is ever resumed."""
+
+from __future__ import annotations
+
+from .turn import WuasTurn, TurnSegment
+from .singleplayer import SinglePlayerBoard
+from .events import EventState, EventMetaKey
+from .logs import MessageLogger
+from .names import ObjectNamer
+from wuas.board import Board
+from wuas.config import ConfigFile
+from wuas.hashing import board_hash
+
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Sequence
+import hashlib
+import json
+import pickle
+
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """A player's EventState after some segment of a turn."""
+    board: Board
+    meta: dict[EventMetaKey, object]
+    messages: tuple[str, ...]
+
+    @classmethod
+    def capture(cls, state: EventState) -> Checkpoint:
+        return cls(
+            board=deepcopy(state.board.board),
+            meta=dict(state.meta),
+            messages=tuple(state.logger.messages()),
+        )
+
+    def restore(self, player_id: str, namer: ObjectNamer, config: ConfigFile) -> EventState:
+        """A new EventState for the player, equal to the captured one.
+        The checkpoint itself is not modified by the new state."""
+        state = EventState(
+            logger=MessageLogger(list(self.messages)),
+            board=SinglePlayerBoard(board=deepcopy(self.board), player_id=player_id),
+            namer=namer,
+            config=config,
+        )
+        state.meta.update(self.meta)
+        return state
+
+
+class CheckpointStore(ABC):
+    """Storage for checkpoints, by key."""
+
+    @abstractmethod
+    def load(self, key: str) -> Checkpoint | None:
+        """The checkpoint stored under the given key, or None."""
+        ...
+
+    @abstractmethod
+    def store(self, key: str, checkpoint: Checkpoint) -> None:
+        ...
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """A CheckpointStore which keeps checkpoints in memory, for
+    re-evaluating a growing turn within a single process."""
+    _checkpoints: dict[str, Checkpoint]
+
+    def __init__(self) -> None:
+        self._checkpoints = {}
+
+    def load(self, key: str) -> Checkpoint | None:
+        return self._checkpoints.get(key)
+
+    def store(self, key: str, checkpoint: Checkpoint) -> None:
+        self._checkpoints[key] = checkpoint
+
+
+class TurnKeys:
+    """The checkpoint keys of a turn, evaluated from a particular board
+    with a particular configuration."""
+    _base_data: str
+    _segment_digests: list[str]
+
+    def __init__(self, config: ConfigFile, board: Board, turn: WuasTurn) -> None:
+        self._base_data = json.dumps([CHECKPOINT_FORMAT_VERSION, board_hash(board), config.fingerprint()])
+        self._segment_digests = [_segment_digest(segment) for segment in turn]
+
+    def player_keys(self, player_id: str) -> Sequence[str]:
+        """The keys of the player's state before any segment of the
+        turn (index 0), and after each segment (index i + 1)."""
+        key = _sha256(json.dumps([self._base_data, player_id]))
+        keys = [key]
+        for segment_digest in self._segment_digests:
+            key = _sha256(key + segment_digest)
+            keys.append(key)
+        return keys
+
+
+def _segment_digest(segment: TurnSegment) -> str:
+    # Events are picklable (see wuas.movement.events.Event), and equal
+    # segments parsed from equal text pickle identically.
+    return hashlib.sha256(pickle.dumps(segment, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
@@ -2,11 +2,12 @@
 from __future__ import annotations
 
 from .logs import MessageLogger
-from .singleplayer import SinglePlayerBoard
+from .singleplayer import SinglePlayerBoard, find_players
 from .names import ObjectNamer
 from .direction import Direction
 from wuas.processing.game2024_mirror import MirrorWithPlayersProcessor, MovementExplanation
 from wuas.config import ConfigFile
+from wuas.board import Board
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
@@ -20,6 +21,10 @@ class Event(ABC):
     """An event mutates the board and potentially logs one or more
     messages to a message logger.
 
+    Events must be picklable, so that parsed turns can be cached (see
+    wuas.movement.cache). In particular, they must not hold lambdas or
+    local functions.
+
     """
 
     @abstractmethod
@@ -32,6 +37,38 @@ class Event(ABC):
         ...
 
 
+class SharedEvent(Event):
+    """An event whose effect on the board does not depend on which
+    player's turn is being evaluated. Such an event can be run once on
+    a board shared by every player, before the board is copied for
+    each player's own events.
+
+    """
+
+    @abstractmethod
+    def execute_shared(self, state: SharedEventState) -> PlayerEffect:
+        """Runs the event on the shared board, and returns the part
+        of the event which is particular to each player: the messages
+        logged and any changes to the event metadata. Anything the
+        player's part needs to know about the board at this point in
+        the turn (such as a player's position) must be captured here,
+        since the player's part runs later, on a copy of the board.
+
+        """
+        ...
+
+    def execute(self, state: EventState) -> None:
+        with state.board.moving_player() as board:
+            shared_state = SharedEventState(
+                board=board,
+                player_ids=(state.board.player_id,),
+                namer=state.namer,
+                config=state.config,
+            )
+            player_effect = self.execute_shared(shared_state)
+        player_effect(state)
+
+
 @dataclass(kw_only=True)
 class EventState:
     logger: MessageLogger
@@ -41,39 +78,66 @@ class EventState:
     meta: dict[EventMetaKey, object] = field(init=False, default_factory=lambda: defaultdict(lambda: None))
 
 
+@dataclass(kw_only=True)
+class SharedEventState:
+    """The state of a board shared by the given players."""
+    board: Board
+    player_ids: Sequence[str]
+    namer: ObjectNamer
+    config: ConfigFile
+
+    def player_space_ids(self) -> dict[str, str]:
+        """The ID of the space each player is on, for each of the
+        players who are on the board."""
+        positions = find_players(self.board, self.player_ids)
+        return {player_id: self.board.get_space(pos).space_name for player_id, pos in positions.items()}
+
+
+type PlayerEffect = Callable[[EventState], None]
+
+
 # An EventMetaKey shall be qualified by the defining module. So a key
 # in, for example, wuas.movement.parser.functions shall be prefixed
 # with "wuas.movement.parser.functions.*"
 EventMetaKey = NewType("EventMetaKey", str)
 
 
-class SimpleMessage(Event):
+class SimpleMessage(SharedEvent):
     """An event which does not mutate the board and merely logs a
     message."""
-    _message: Callable[[str], str]
+    _message: str | Callable[[str], str]
 
     def __init__(self, message_or_template: str | Callable[[str], str], /) -> None:
-        if callable(message_or_template):
-            self._message = message_or_template
-        else:
-            self._message = lambda message: message_or_template
+        self._message = message_or_template
 
-    def execute(self, state: EventState) -> None:
-        player_name = state.namer.get_player_name(state.board.player_id)
-        state.logger.log(self._message(player_name))
+    def execute_shared(self, state: SharedEventState) -> PlayerEffect:
+        return self._log_message
+
+    def _log_message(self, state: EventState) -> None:
+        if callable(self._message):
+            player_name = state.namer.get_player_name(state.board.player_id)
+            state.logger.log(self._message(player_name))
+        else:
+            state.logger.log(self._message)
 
 
 CONTROLS_REVERSED_KEY = EventMetaKey("wuas.movement.events.CONTROLS_REVERSED_KEY")
 
 
-class ReverseControlsEvent(Event):
-    def execute(self, state: EventState) -> None:
+class ReverseControlsEvent(SharedEvent):
+    def execute_shared(self, state: SharedEventState) -> PlayerEffect:
+        return self._reverse_controls
+
+    def _reverse_controls(self, state: EventState) -> None:
         state.meta[CONTROLS_REVERSED_KEY] = True
         state.logger.log("Controls are reversed.")
 
 
-class ShotWithSabotageGunEvent(Event):
-    def execute(self, state: EventState) -> None:
+class ShotWithSabotageGunEvent(SharedEvent):
+    def execute_shared(self, state: SharedEventState) -> PlayerEffect:
+        return self._toggle_controls
+
+    def _toggle_controls(self, state: EventState) -> None:
         state.meta[CONTROLS_REVERSED_KEY] = not state.meta[CONTROLS_REVERSED_KEY]
         player_name = state.namer.get_player_name(state.board.player_id)
         verb = "reversed" if state.meta[CONTROLS_REVERSED_KEY] else "un-reversed"
@@ -81,10 +145,13 @@ class ShotWithSabotageGunEvent(Event):
 
 
 @define(eq=False)
-class UserInputEvent(Event):
+class UserInputEvent(SharedEvent):
     _inputs: Sequence[Direction]
 
-    def execute(self, state: EventState) -> None:
+    def execute_shared(self, state: SharedEventState) -> PlayerEffect:
+        return self._log_inputs
+
+    def _log_inputs(self, state: EventState) -> None:
         player_name = state.namer.get_player_name(state.board.player_id)
         original_inputs = ', '.join([d.name for d in self._inputs])
         message = f"{player_name} attempts to move: {original_inputs}."
@@ -95,16 +162,20 @@ class UserInputEvent(Event):
 
 
 @define(eq=False)
-class TurnStartEvent(Event):
+class TurnStartEvent(SharedEvent):
 
     def message(self, player_name: str, space_name: str) -> str:
         return f"{player_name} begins their turn on **{space_name}**."
 
-    def execute(self, state: EventState) -> None:
-        player_name = state.namer.get_player_name(state.board.player_id)
-        player_pos = state.board.player_pos
-        space_name = state.namer.get_space_name(state.board.board.get_space(player_pos).space_name)
-        state.logger.log(self.message(player_name=player_name, space_name=space_name))
+    def execute_shared(self, state: SharedEventState) -> PlayerEffect:
+        space_ids = state.player_space_ids()
+
+        def _log_turn_start(state: EventState) -> None:
+            player_name = state.namer.get_player_name(state.board.player_id)
+            space_name = state.namer.get_space_name(space_ids[state.board.player_id])
+            state.logger.log(self.message(player_name=player_name, space_name=space_name))
+
+        return _log_turn_start
 
 
 @define(eq=False)
@@ -127,9 +198,7 @@ class MovementEvent(Event):
 
     @classmethod
     def by_gravity(cls, direction: Direction = Direction.DOWN):
-        def _message(*, player_name: str, space_name: str) -> str:
-            return f"{player_name} falls **{direction.name}** due to gravity, onto **{space_name}**."
-        return cls(direction=direction, custom_message=_message)
+        return cls(direction=direction, custom_message=GravityMessage(direction))
 
 
 class MovementEventCustomMessage(Protocol):
@@ -137,28 +206,41 @@ class MovementEventCustomMessage(Protocol):
         ...
 
 
-class MirrorBoardEvent(Event):
+@define(frozen=True)
+class GravityMessage:
+    """The message for a player falling in the given direction."""
+    direction: Direction
+
+    def __call__(self, *, player_name: str, space_name: str) -> str:
+        return f"{player_name} falls **{self.direction.name}** due to gravity, onto **{space_name}**."
+
+
+class MirrorBoardEvent(SharedEvent):
     _processor: MirrorWithPlayersProcessor
 
     def __init__(self) -> None:
         self._processor = MirrorWithPlayersProcessor()
 
-    def execute(self, state: EventState) -> None:
-        msg = "The board has been mirrored."
-        with state.board.moving_player() as board:
-            summary = self._processor.run_with_summary(config=state.config, board=board)
-        explanation = MirrorBoardEvent._find_matching_player(
-            player_id=state.board.player_id,
-            summary=summary,
-        )
-        player_name = state.namer.get_player_name(state.board.player_id)
-        space_name = state.namer.get_space_name(state.board.player_space.space_name)
-        if explanation.moved_with_board:
-            target_space_name = state.namer.get_space_name(explanation.space_at_original_coords)
-            msg += f" {player_name} could not remain at the same X/Y position due to **{target_space_name}** in the way, so they remain on **{space_name}**."
-        else:
-            msg += f" {player_name} was able to remain at the same X/Y position and is now on **{space_name}**."
-        state.logger.log(msg)
+    def execute_shared(self, state: SharedEventState) -> PlayerEffect:
+        summary = self._processor.run_with_summary(config=state.config, board=state.board)
+        space_ids = state.player_space_ids()
+
+        def _log_mirror(state: EventState) -> None:
+            msg = "The board has been mirrored."
+            explanation = MirrorBoardEvent._find_matching_player(
+                player_id=state.board.player_id,
+                summary=summary,
+            )
+            player_name = state.namer.get_player_name(state.board.player_id)
+            space_name = state.namer.get_space_name(space_ids[state.board.player_id])
+            if explanation.moved_with_board:
+                target_space_name = state.namer.get_space_name(explanation.space_at_original_coords)
+                msg += f" {player_name} could not remain at the same X/Y position due to **{target_space_name}** in the way, so they remain on **{space_name}**."
+            else:
+                msg += f" {player_name} was able to remain at the same X/Y position and is now on **{space_name}**."
+            state.logger.log(msg)
+
+        return _log_mirror
 
     @staticmethod
     def _find_matching_player(player_id: str, summary: Iterable[MovementExplanation]) -> MovementExplanation:
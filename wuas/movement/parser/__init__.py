@@ -11,6 +11,7 @@ from wuas.config import ConfigFile
 from wuas.movement.prolog import parse_prolog, HornClause, Call, Atom
 from wuas.movement.turn import WuasTurn, TurnSegment, TurnKey, PlayerTurnKey, Global
 from wuas.movement.events import Event
+from wuas.movement.cache import TurnCache, turn_cache_key
 from wuas.movement.direction import Direction
 from .assertions import assert_atom
 from .error import ParseError
@@ -33,11 +34,20 @@ class WuasTurnParser:
         """Parses Horn clauses as a WuasTurn object. Raises ParseError on failure."""
         return WuasTurn(self._parse_clause(clause) for clause in data)
 
-    def parse(self, text: str) -> WuasTurn:
+    def parse(self, text: str, *, cache: TurnCache | None = None) -> WuasTurn:
         """Parses text as Prolog, then as a WuasTurn object. Raises
-        ParseError on failure."""
-        prolog_data = parse_prolog(text)
-        return self.parse_clauses(prolog_data)
+        ParseError on failure. If a cache is given, a turn previously
+        parsed from the same text, with the same definitions, is
+        loaded from the cache instead, and a newly parsed turn is
+        stored in it."""
+        if cache is None:
+            return self.parse_clauses(parse_prolog(text))
+        key = turn_cache_key(self._config, text)
+        turn = cache.load(key)
+        if turn is None:
+            turn = self.parse_clauses(parse_prolog(text))
+            cache.store(key, turn)
+        return turn
 
     def _parse_clause(self, horn_clause: HornClause) -> TurnSegment:
         turn_key = self._parse_clause_head(horn_clause.head)
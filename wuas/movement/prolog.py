@@ -2,20 +2,26 @@
 """Implementation of a subset of the Prolog programming language's
 syntax, for use as a DSL.
 
+The grammar (res/prolog.lark) is parsed with an LALR parser, which
+runs in linear time in the length of the input. The transformer is
+applied during parsing, so the parser produces HornClause and Call
+objects directly, without building an intermediate parse tree. The
+parser is constructed on first use, and Lark caches the compiled
+grammar on disk (in the system's temporary directory), so later runs
+skip the grammar analysis entirely.
+
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import NewType, Any
+from functools import cache
+from typing import NewType, Any, cast
 
 from lark import Lark, Transformer, Token
 
 from wuas.util import project_root
 
-with open(project_root() / 'res' / 'prolog.lark', 'r') as f:
-    _lark_parser = Lark(f)
-
 
 Atom = NewType('Atom', str)
 
@@ -81,7 +87,13 @@ class PrologLarkTransformer(Transformer):
         return Call.list(tuple(items))
 
 
+@cache
+def _lark_parser() -> Lark:
+    with open(project_root() / 'res' / 'prolog.lark', 'r') as f:
+        return Lark(f, parser='lalr', transformer=PrologLarkTransformer(), cache=True)
+
+
 def parse_prolog(text: str) -> tuple[HornClause, ...]:
     """Parses a Prolog-lite program as a sequence of horn clauses."""
-    tokens = _lark_parser.parse(text)
-    return PrologLarkTransformer().transform(tokens)
+    # The inline transformer turns the parse into the result of PrologLarkTransformer.start.
+    return cast(tuple[HornClause, ...], _lark_parser().parse(text))
@@ -4,7 +4,7 @@ from __future__ import annotations
 from wuas.board import Board, move_token, Space
 from wuas.floornumber import FloorNumber
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Iterator, Iterable
 
 
 class SinglePlayerBoard:
@@ -89,3 +89,18 @@ def _find_player(board: Board, player_id: str) -> tuple[int, int, FloorNumber]:
         if any(tok.name == player_id for tok in space.get_tokens()):
             return pos
     raise ValueError(f"Player {player_id} not found in board")
+
+
+def find_players(board: Board, player_ids: Iterable[str]) -> dict[str, tuple[int, int, FloorNumber]]:
+    """Finds the positions of several players in a single pass over
+    the board. Players who are not on the board are omitted."""
+    remaining = set(player_ids)
+    positions: dict[str, tuple[int, int, FloorNumber]] = {}
+    for pos in board.indices:
+        if not remaining:
+            break
+        for token in board.get_space(pos).get_tokens():
+            if token.name in remaining:
+                remaining.remove(token.name)
+                positions[token.name] = pos
+    return positions
@@ -7,7 +7,7 @@ from itertools import chain
 
 from attrs import define, field
 
-from .events import Event
+from .events import Event, SharedEvent
 
 
 type TurnKey = PlayerTurnKey | Global
@@ -30,6 +30,22 @@ class WuasTurn:
         given player."""
         return chain.from_iterable(map(lambda segment: segment.events, self.filtered(player_id)))
 
+    def split_shared_prefix(self) -> tuple[list[SharedEvent], WuasTurn]:
+        """Splits the turn into the longest prefix of events which are
+        global and shared (see SharedEvent), and the rest of the turn.
+        The prefix is the same for every player, so it can be evaluated
+        once for all of them."""
+        prefix: list[SharedEvent] = []
+        for segment_index, segment in enumerate(self._segments):
+            if not isinstance(segment.key, Global):
+                return prefix, WuasTurn(self._segments[segment_index:])
+            for event_index, event in enumerate(segment.events):
+                if not isinstance(event, SharedEvent):
+                    rest = TurnSegment(segment.key, segment.events[event_index:])
+                    return prefix, WuasTurn([rest, *self._segments[segment_index + 1:]])
+                prefix.append(event)
+        return prefix, WuasTurn(())
+
 
 class TurnSegment(NamedTuple):
     """A segment of a turn consists of a key indicating to whom it
@@ -45,6 +45,13 @@ class OutputProducer[A](ABC):
         ...
 
 
+class OutputError(Exception):
+    """Raised by an output producer which cannot produce its output,
+    for reasons which should be reported to the user rather than as a
+    bug."""
+    pass
+
+
 @dataclass(frozen=True)
 class NoArguments:
     """Empty dataclass, for output producers which do not use any
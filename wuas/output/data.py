@@ -5,19 +5,28 @@ be exactly equal.
 
 For instance, this file will normalize whitespace. It will also always
 output the most recent file format version, even if the input file was
-given in an earlier format."""
+given in an earlier format.
+
+The in-place variant (InPlaceDatafileProducer) instead writes back to
+the input file, and keeps the original text of every section and floor
+whose contents have not changed since the file was loaded, so that
+small edits produce small diffs. Unchanged sections are detected by
+comparing contents, and only changed sections are rendered at all."""
 
 from __future__ import annotations
 
-from wuas.board import Board, Floor, Token, ConcreteToken, HiddenToken
-from wuas.config import ConfigFile
-from wuas.loader import SPACE_LABEL_MARKER
+from wuas.board import Board, Floor, TileData, Token, ConcreteToken, HiddenToken
+from wuas.floornumber import FloorNumber
+from wuas.config import ConfigFile, normalize_space_name
+from wuas.loader import SPACE_LABEL_MARKER, DatafileSections, loaded_sections
 from wuas.output.abc import OutputProducer, NoArguments
-from wuas.output.registry import REGISTERED_PRODUCERS
+from wuas.output.registry import REGISTERED_PRODUCERS, registered_producer
 
 import sys
 import argparse
-from typing import TextIO
+from io import StringIO
+from typing import TextIO, Callable
+from dataclasses import dataclass
 
 # For Emacs compatibility
 COMMENT_LINES = (
@@ -31,72 +40,135 @@ CURRENT_VERSION_NUMBER = 5
 
 def render_to_data_file(board: Board, output_file: TextIO) -> None:
     """Render the board to the given file-like object, which must be
-    opened for output."""
+    opened for output.
 
-    # Introductory comments
-    for comment_line in COMMENT_LINES:
-        output_file.write(comment_line + '\n')
-    output_file.write('\n')
+    Each section (and each floor) is assembled in memory and written
+    with a single call, so this is efficient even for unbuffered
+    file-like objects."""
 
-    # Versioning
-    output_file.write(str(CURRENT_VERSION_NUMBER) + '\n')
+    # Introductory comments and versioning
+    output_file.write(_render_preamble())
 
     # Meta data
-    for k, v in board.meta.items():
-        output_file.write(f"{k}: {v}\n")
-    output_file.write('\n')
+    output_file.write(_render_meta(board))
 
     # Board contents
+    cell_cache: dict[str, str] = {}
     for z, floor in board.floors.items():
-        output_file.write(f"floor={z.name}\n")
-        _print_board_contents(floor, output_file)
+        output_file.write(_render_floor(z, floor, cell_cache))
     output_file.write("\n")
 
     # Token reference
-    _print_token_references(board, output_file)
-    output_file.write('\n')
+    output_file.write(_render_token_references(board))
 
     # Attribute reference
-    _print_attribute_references(board, output_file)
-    output_file.write('\n')
+    output_file.write(_render_attribute_references(board))
 
     # Graph data
-    _print_graph_data(board, output_file)
-    output_file.write('\n')
+    output_file.write(_render_graph_data(board))
+
+
+def update_data_file(board: Board, sections: DatafileSections) -> str:
+    """Render the board as a datafile, reusing the original text of
+    every section (and every individual floor) of the file it was
+    loaded from whose contents have not changed since it was loaded.
+    Only the sections which changed are rendered and spliced into the
+    original text.
+
+    If the original file uses an older version of the format, or the
+    set of floors has changed, then the whole board is re-rendered as
+    if by render_to_data_file."""
+    original = sections.original
+    if sections.version != CURRENT_VERSION_NUMBER or list(sections.floors) != list(board.floors):
+        output = StringIO()
+        render_to_data_file(board, output)
+        return output.getvalue()
+
+    def _reuse_or_render(span: tuple[int, int], unchanged: bool, render: Callable[[], str]) -> str:
+        return sections.source(span) if unchanged else render()
+
+    cell_cache: dict[str, str] = {}
+    chunks = [sections.source(sections.preamble)]
+    chunks.append(_reuse_or_render(sections.meta, board.meta == original.meta, lambda: _render_meta(board)))
+    for z, floor in board.floors.items():
+        chunks.append(_reuse_or_render(
+            sections.floors[z],
+            floor.rows == original.floors[z].rows,
+            lambda: _render_floor(z, floor, cell_cache),
+        ))
+    chunks.append(sections.source(sections.floors_end))
+    chunks.append(_reuse_or_render(
+        sections.tokens,
+        board.tokens == original.tokens,
+        lambda: _render_token_references(board),
+    ))
+    chunks.append(_reuse_or_render(
+        sections.attributes,
+        board.attributes == original.attributes,
+        lambda: _render_attribute_references(board),
+    ))
+    chunks.append(_reuse_or_render(
+        sections.graph,
+        board.graph_edges == original.graph_edges,
+        lambda: _render_graph_data(board),
+    ))
+    return ''.join(chunks)
+
+
+def _render_preamble() -> str:
+    lines = [comment_line + '\n' for comment_line in COMMENT_LINES]
+    lines.append('\n')
+    lines.append(str(CURRENT_VERSION_NUMBER) + '\n')
+    return ''.join(lines)
+
+
+def _render_meta(board: Board) -> str:
+    return ''.join(f"{k}: {v}\n" for k, v in board.meta.items()) + '\n'
+
+
+def _render_floor(z: FloorNumber, floor: Floor, cell_cache: dict[str, str] | None = None) -> str:
+    """Render a single floor, including its header line and the blank
+    line after it. The optional cell_cache maps cell text to its
+    fixed-width rendering and may be shared across floors, since most
+    boards use only a handful of distinct cell strings."""
+    if cell_cache is None:
+        cell_cache = {}
+    separator_row = HEADER_SLOT * floor.width + '+\n'
+
+    def _cell(text: str) -> str:
+        try:
+            return cell_cache[text]
+        except KeyError:
+            cell = cell_cache[text] = ' ' + text.ljust(SPACE_TEXT_WIDTH - 1) + '|'
+            return cell
+
+    chunks = [f"floor={z.name}\n"]
+    for row in floor.rows:
+        chunks.append(separator_row)
+        # Spaces layer
+        chunks.append('|' + ''.join([
+            _cell(normalize_space_name(tile.space_name) + ''.join(tile.attribute_ids))
+            for tile in row
+        ]) + '\n')
+        # Tokens layer
+        chunks.append('|' + ''.join([_cell(_token_layer_text(tile)) for tile in row]) + '\n')
+    chunks.append(separator_row + '\n')
+    return ''.join(chunks)
 
 
-def _print_board_contents(floor: Floor, output_file: TextIO) -> None:
-    width = floor.width
-    height = floor.height
-    separator_row = HEADER_SLOT * width + '+'
+def _token_layer_text(tile: TileData) -> str:
+    token_layer_text = ''.join(tile.token_ids)
+    if tile.space_label is not None:
+        token_layer_text += SPACE_LABEL_MARKER + tile.space_label
+    return token_layer_text
 
-    for y in range(height):
-        output_file.write(separator_row + '\n')
-        # Spaces layer
-        output_file.write('|')
-        for x in range(width):
-            space = floor.get_space(x, y)
-            space_text = space.space_name + ''.join(space.attribute_ids)
-            output_file.write(' {:<{}}|'.format(space_text, SPACE_TEXT_WIDTH - 1))
-        output_file.write('\n')
-        # Tokens layer
-        output_file.write('|')
-        for x in range(width):
-            space = floor.get_space(x, y)
-            token_layer_text = ''.join(space.token_ids)
-            if space.space_label is not None:
-                token_layer_text += SPACE_LABEL_MARKER + space.space_label
-            output_file.write(' {:<{}}|'.format(token_layer_text, SPACE_TEXT_WIDTH - 1))
-        output_file.write('\n')
-    output_file.write(separator_row + '\n\n')
-
-
-def _print_token_references(board: Board, output_file: TextIO) -> None:
-    max_token_length = max(len(_concretify_token(token).token_name) for token in board.tokens.values())
-    max_item_length = max(len(_concretify_token(token).item_name or 'nil') for token in board.tokens.values())
-    for key, value in board.tokens.items():
-        token = _concretify_token(value)
-        output_file.write("{} {:<{}} {:<{}} {:>2} {:>2}\n".format(
+
+def _render_token_references(board: Board) -> str:
+    tokens = [(key, _concretify_token(value)) for key, value in board.tokens.items()]
+    max_token_length = max((len(token.token_name) for _, token in tokens), default=0)
+    max_item_length = max((len(token.item_name or 'nil') for _, token in tokens), default=0)
+    return ''.join([
+        "{} {:<{}} {:<{}} {:>2} {:>2}\n".format(
             key,
             token.token_name,
             max_token_length,
@@ -104,7 +176,9 @@ def _print_token_references(board: Board, output_file: TextIO) -> None:
             max_item_length,
             token.position[0],
             token.position[1],
-        ))
+        )
+        for key, token in tokens
+    ]) + '\n'
 
 
 def _concretify_token(token: Token) -> ConcreteToken:
@@ -114,14 +188,12 @@ def _concretify_token(token: Token) -> ConcreteToken:
         return token
 
 
-def _print_attribute_references(board: Board, output_file: TextIO) -> None:
-    for key, value in board.attributes.items():
-        output_file.write(f"{key} {value.name}\n")
+def _render_attribute_references(board: Board) -> str:
+    return ''.join(f"{key} {value.name}\n" for key, value in board.attributes.items()) + '\n'
 
 
-def _print_graph_data(board: Board, output_file: TextIO) -> None:
-    for edge in board.graph_edges:
-        output_file.write(edge.to_data_str() + "\n")
+def _render_graph_data(board: Board) -> str:
+    return ''.join(edge.to_data_str() + "\n" for edge in board.graph_edges) + '\n'
 
 
 class DatafileProducer(OutputProducer[NoArguments]):
@@ -149,3 +221,39 @@ class DatafileProducer(OutputProducer[NoArguments]):
 
 
 REGISTERED_PRODUCERS.register_callable('datafile', DatafileProducer.stdout)
+
+
+@dataclass(frozen=True, kw_only=True)
+class InPlaceDatafileArgs:
+    # Taken from the top-level arguments, not the subparser.
+    input_filename: str
+
+
+@registered_producer(aliases=['datafile-inplace'])
+class InPlaceDatafileProducer(OutputProducer[InPlaceDatafileArgs]):
+    """OutputProducer that writes the board back to the file it was
+    loaded from. Only the sections of the file which have changed are
+    rewritten, and the file is not touched at all if nothing has
+    changed. A board which was not loaded by load_from_file (or whose
+    datafile predates floors) is rendered in full."""
+    ARGUMENTS_TYPE = InPlaceDatafileArgs
+
+    def produce_output(self, config: ConfigFile, board: Board, args: InPlaceDatafileArgs) -> None:
+        sections = loaded_sections(board)
+        if sections is not None:
+            original_text = sections.text
+            new_text = update_data_file(board, sections)
+        else:
+            with open(args.input_filename, 'r') as input_file:
+                original_text = input_file.read()
+            output = StringIO()
+            render_to_data_file(board, output)
+            new_text = output.getvalue()
+        if new_text != original_text:
+            with open(args.input_filename, 'w') as output_file:
+                output_file.write(new_text)
+
+    def init_subparser(self, subparser: argparse.ArgumentParser) -> None:
+        """InPlaceDatafileProducer accepts no subarguments. It always
+        writes to the input file."""
+        pass
@@ -8,13 +8,14 @@ from wuas.board import Board, Floor, Space, ConcreteToken
 from wuas.floornumber import FloorNumber
 from wuas.constants import SPACE_WIDTH, SPACE_HEIGHT, Layer
 from wuas.config import ConfigFile, find_matching_for_layer
-from wuas.output.abc import OutputProducer
+from wuas.output.abc import OutputProducer, OutputError
 from wuas.output.registry import registered_producer
 from .majora import MAJORAS_MOON_LAYER, render_moon
+from .heatmap import LIGHT_HEATMAP_LAYER, render_light_heatmap, cached_light_levels
 
 from PIL import Image, ImageDraw
 
-from typing import Set, Iterable, NamedTuple, Literal
+from typing import Set, Iterable, NamedTuple, Literal, Sequence
 from dataclasses import dataclass
 import argparse
 
@@ -36,12 +37,23 @@ class Renderer:
     floor_number: FloorNumber
     floor: Floor
     image: Image.Image
-
-    def __init__(self, config: ConfigFile, board: Board, floor_number: FloorNumber, floor: Floor) -> None:
+    light_levels: Sequence[Sequence[int]] | None
+
+    def __init__(
+            self,
+            config: ConfigFile,
+            board: Board,
+            floor_number: FloorNumber,
+            floor: Floor,
+            light_levels: Sequence[Sequence[int]] | None = None,
+    ) -> None:
+        """A renderer for the given floor. If light_levels is given,
+        the floor is overlaid with a heatmap of those light levels."""
         self.config = config
         self.floor_number = floor_number
         self.floor = floor
         self.board = board
+        self.light_levels = light_levels
         image_width = SPACE_WIDTH * floor.width
         image_height = SPACE_HEIGHT * floor.height
         self.image = Image.new("RGBA", (image_width, image_height))
@@ -50,6 +62,8 @@ class Renderer:
         """Render the spaces associated with the given layer. If the
         layer is Layer.TOKEN, also render the tokens on the board."""
         self._render_spaces(layer)
+        if layer is LIGHT_HEATMAP_LAYER and self.light_levels is not None:
+            render_light_heatmap(self, self.light_levels)
         if layer is Layer.HIGHWAY:
             self._render_highway()
         if layer is MAJORAS_MOON_LAYER:
@@ -143,10 +157,16 @@ class Renderer:
         return self.image
 
 
-def render_image(config: ConfigFile, board: Board, floor_number: FloorNumber, floor: Floor) -> Image.Image:
+def render_image(
+        config: ConfigFile,
+        board: Board,
+        floor_number: FloorNumber,
+        floor: Floor,
+        light_levels: Sequence[Sequence[int]] | None = None,
+) -> Image.Image:
     """Render the floor to an image file by drawing the layers in
     order."""
-    renderer = Renderer(config, board, floor_number, floor)
+    renderer = Renderer(config, board, floor_number, floor, light_levels)
     for layer in Layer:
         renderer.render_layer(layer)
     return renderer.build()
@@ -155,6 +175,26 @@ def render_image(config: ConfigFile, board: Board, floor_number: FloorNumber, fl
 @dataclass(frozen=True, kw_only=True)
 class ImageProducerArgs:
     floor_number: FloorNumber
+    light_overlay: bool
+
+
+def _render_floor_image(config: ConfigFile, board: Board, args: ImageProducerArgs) -> Image.Image:
+    light_levels = None
+    if args.light_overlay:
+        try:
+            light_levels = cached_light_levels(config, board, args.floor_number)
+        except ValueError as exc:
+            raise OutputError(f"Cannot draw the light overlay: {exc}") from None
+    return render_image(config, board, args.floor_number, board.floors[args.floor_number], light_levels)
+
+
+def _init_image_subparser(subparser: argparse.ArgumentParser) -> None:
+    subparser.add_argument('-F', '--floor-number', type=FloorNumber, required=True)
+    subparser.add_argument(
+        '--light-overlay',
+        action='store_true',
+        help="Overlay the cached light levels of the board (see grid_cache in the lighting config)",
+    )
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -168,11 +208,11 @@ class DisplayedImageProducer(OutputProducer[ImageProducerArgs]):
     ARGUMENTS_TYPE = ImageProducerArgs
 
     def produce_output(self, config: ConfigFile, board: Board, args: ImageProducerArgs) -> None:
-        image = render_image(config, board, args.floor_number, board.floors[args.floor_number])
+        image = _render_floor_image(config, board, args)
         image.show()
 
     def init_subparser(self, subparser: argparse.ArgumentParser) -> None:
-        subparser.add_argument('-F', '--floor-number', type=FloorNumber, required=True)
+        _init_image_subparser(subparser)
 
 
 @registered_producer(aliases=["save-image"])
@@ -181,9 +221,9 @@ class SavedImageProducer(OutputProducer[SavedImageProducerArgs]):
     ARGUMENTS_TYPE = SavedImageProducerArgs
 
     def produce_output(self, config: ConfigFile, board: Board, args: SavedImageProducerArgs) -> None:
-        image = render_image(config, board, args.floor_number, board.floors[args.floor_number])
+        image = _render_floor_image(config, board, args)
         image.save(args.output_filename)
 
     def init_subparser(self, subparser: argparse.ArgumentParser) -> None:
-        subparser.add_argument('-F', '--floor-number', type=FloorNumber, required=True)
+        _init_image_subparser(subparser)
         subparser.add_argument('-o', '--output-filename', required=True)
@@ -0,0 +1,71 @@
+
+"""Heatmap overlay of light levels, taken from the lighting grid cache
+rather than recomputed."""
+
+from __future__ import annotations
+
+from wuas.board import Board
+from wuas.config import ConfigFile
+from wuas.constants import SPACE_WIDTH, SPACE_HEIGHT, Layer
+from wuas.floornumber import FloorNumber
+from wuas.hashing import board_hash
+from wuas.processing.lighting.config import LightingConfig
+from wuas.processing.lighting.state import LightingGridCache
+
+from typing import TYPE_CHECKING, Sequence, cast
+from PIL import Image, ImageDraw
+
+if TYPE_CHECKING:
+    from . import Renderer
+
+
+# Drawn after every space, but before tokens.
+LIGHT_HEATMAP_LAYER = Layer.HIGHWAY_SPACE
+
+UNLIT_COLOR = (0, 0, 64, 160)
+LIT_COLOR = (255, 200, 0)
+MIN_LIT_ALPHA = 48
+MAX_LIT_ALPHA = 192
+
+
+def cached_light_levels(config: ConfigFile, board: Board, floor_number: FloorNumber) -> Sequence[Sequence[int]]:
+    """The cached light levels of the given floor, as a list of rows.
+    Raises ValueError if there is no lighting configuration or it has
+    no grid cache, or if this board (or this floor of it) has not been
+    lit."""
+    try:
+        lighting_json = config.meta['lighting']
+    except KeyError:
+        raise ValueError("Configuration has no lighting settings") from None
+    lighting_config = LightingConfig.from_json(lighting_json)
+    if lighting_config.grid_cache is None:
+        raise ValueError("Lighting configuration does not specify a grid_cache")
+    levels = LightingGridCache(lighting_config.grid_cache).load(board_hash(board))
+    if levels is None:
+        raise ValueError(f"No cached lighting grid for this board in {lighting_config.grid_cache}")
+    try:
+        floor_levels = levels[floor_number]
+    except KeyError:
+        raise ValueError(f"No cached light levels for floor {floor_number.name}") from None
+    return cast(list[list[int]], floor_levels.tolist())
+
+
+def render_light_heatmap(renderer: Renderer, light_levels: Sequence[Sequence[int]]) -> None:
+    """Shade every space by its light level. Unlit spaces are shaded
+    dark, and lit spaces are tinted more strongly the brighter they
+    are, with the light level written in the corner."""
+    max_level = max((level for row in light_levels for level in row), default=0)
+    overlay = Image.new("RGBA", renderer.image.size)
+    draw = ImageDraw.Draw(overlay)
+    for y, row in enumerate(light_levels):
+        for x, level in enumerate(row):
+            x0 = x * SPACE_WIDTH
+            y0 = y * SPACE_HEIGHT
+            box = (x0, y0, x0 + SPACE_WIDTH - 1, y0 + SPACE_HEIGHT - 1)
+            if level <= 0:
+                draw.rectangle(box, fill=UNLIT_COLOR)
+                continue
+            alpha = MIN_LIT_ALPHA + (MAX_LIT_ALPHA - MIN_LIT_ALPHA) * level // max_level
+            draw.rectangle(box, fill=(*LIT_COLOR, alpha))
+            draw.text((x0 + 2, y0 + 2), str(level), fill='black')
+    renderer.image.alpha_composite(overlay)
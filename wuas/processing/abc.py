@@ -1,8 +1,16 @@
 
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import ClassVar, TYPE_CHECKING
 
-from wuas.board import Board
+from wuas.board import Board, TileData
 from wuas.config import ConfigFile
+from wuas.floornumber import FloorNumber
+from wuas.rng import RandomStreams
+
+if TYPE_CHECKING:
+    from wuas.processing.access import BoardAccess
 
 
 class BoardProcessor(ABC):
@@ -11,3 +19,72 @@ class BoardProcessor(ABC):
     @abstractmethod
     def run(self, config: ConfigFile, board: Board) -> None:
         ...
+
+    def access(self) -> BoardAccess | None:
+        """The parts of the board which this processor reads and
+        writes, or None if they are unknown. A processor with unknown
+        access is never run concurrently with any other."""
+        return None
+
+    def cache_key(self) -> str | None:
+        """A string which identifies the parameters of this processor
+        that affect its result, or None if its result cannot be reused.
+        A processor should only report a key if running it twice on
+        the same board with the same configuration always produces the
+        same board (see wuas.processing.memo)."""
+        return None
+
+
+class RandomizedProcessor(BoardProcessor):
+    """A BoardProcessor which makes random choices. Every random number
+    it uses is drawn from random_streams, with a separate stream for
+    each independent part of its work (such as each floor), so its
+    result depends only on the board, the configuration, and the
+    streams. In particular, running it twice on the same board with
+    the same streams produces the same board."""
+    random_streams: RandomStreams
+
+    def __init__(self, seed: int | None = None) -> None:
+        """If seed is given, the random choices made by this processor
+        are reproducible."""
+        self.random_streams = RandomStreams(seed)
+
+    def cache_key(self) -> str | None:
+        return self.random_streams.fingerprint()
+
+
+class TileVisitorProcessor(BoardProcessor):
+    """A BoardProcessor whose changes to the board are made one tile at
+    a time. The effect of visit on a tile may depend only on that tile
+    and on the state built up by prepare, never on the other tiles of
+    the board. This allows several consecutive visitors to share a
+    single traversal of the board (see wuas.processing.pipeline).
+
+    prepare is called once before the traversal. Unless
+    PREPARE_READS_BOARD is set, it must not look at (or change) the
+    tiles of the board, since it may be called before the traversals
+    of the visitors which precede it. finish is called once after the
+    traversal, and must not change the tiles of the board either."""
+
+    # Whether prepare depends on the tiles of the board. If so, every
+    # preceding processor is run to completion before prepare is
+    # called, at the cost of starting a new traversal.
+    PREPARE_READS_BOARD: ClassVar[bool] = False
+
+    def prepare(self, config: ConfigFile, board: Board) -> None:
+        pass
+
+    @abstractmethod
+    def visit(self, x: int, y: int, z: FloorNumber, tile: TileData) -> None:
+        ...
+
+    def finish(self, config: ConfigFile, board: Board) -> None:
+        pass
+
+    def run(self, config: ConfigFile, board: Board) -> None:
+        self.prepare(config, board)
+        for z, floor in board.floors.items():
+            for y, row in enumerate(floor.rows):
+                for x, tile in enumerate(row):
+                    self.visit(x, y, z, tile)
+        self.finish(config, board)
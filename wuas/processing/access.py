@@ -0,0 +1,109 @@
+
+"""Declarations of the parts of a board which a processor reads and
+writes, so that processors which do not interfere with one another can
+be run concurrently (see wuas.processing.scheduler)."""
+
+from __future__ import annotations
+
+from wuas.board import Board, TileData
+from wuas.floornumber import FloorNumber
+
+from typing import Iterable, NamedTuple, Any
+from dataclasses import dataclass
+from enum import Enum
+
+
+class BoardLayer(Enum):
+    """A component of every tile on a floor."""
+    SPACES = 'space_name'
+    TOKENS = 'token_ids'
+    ATTRIBUTES = 'attribute_ids'
+    LABELS = 'space_label'
+
+
+class FloorLayer(NamedTuple):
+    """One layer of one floor, or of every floor if floor is None."""
+    layer: BoardLayer
+    floor: FloorNumber | None = None
+
+    def overlaps(self, other: Resource) -> bool:
+        if not isinstance(other, FloorLayer) or self.layer != other.layer:
+            return False
+        return self.floor is None or other.floor is None or self.floor == other.floor
+
+
+class MetaKey(NamedTuple):
+    """One key of the board's metadata."""
+    key: str
+
+    def overlaps(self, other: Resource) -> bool:
+        return self == other
+
+
+type Resource = FloorLayer | MetaKey
+
+
+@dataclass(frozen=True)
+class BoardAccess:
+    """The resources which a processor reads and writes. A processor
+    must not depend on or change anything outside of these, and it
+    must not change the dimensions or the floors of the board."""
+    reads: frozenset[Resource]
+    writes: frozenset[Resource]
+
+    @classmethod
+    def of(cls, reads: Iterable[Resource] = (), writes: Iterable[Resource] = ()) -> BoardAccess:
+        return cls(frozenset(reads), frozenset(writes))
+
+    def conflicts_with(self, other: BoardAccess) -> bool:
+        """Whether the two processors could interfere with one another,
+        so that the order in which they run matters."""
+        return (
+            _any_overlap(self.writes, other.reads | other.writes) or
+            _any_overlap(other.writes, self.reads)
+        )
+
+
+def _any_overlap(resources: Iterable[Resource], others: frozenset[Resource]) -> bool:
+    return any(resource.overlaps(other) for resource in resources for other in others)
+
+
+@dataclass(frozen=True)
+class BoardChanges:
+    """The values of a set of written resources, taken from one copy
+    of a board so that they can be applied to another."""
+    values: dict[Resource, Any]
+
+    @classmethod
+    def capture(cls, board: Board, writes: Iterable[Resource]) -> BoardChanges:
+        values: dict[Resource, Any] = {}
+        for resource in writes:
+            if isinstance(resource, FloorLayer):
+                attr = resource.layer.value
+                values[resource] = {
+                    z: [[getattr(tile, attr) for tile in row] for row in floor.rows]
+                    for z, floor in board.floors.items()
+                    if resource.floor is None or resource.floor == z
+                }
+            else:
+                values[resource] = board.meta.get(resource.key)
+        return cls(values)
+
+    def apply(self, board: Board) -> None:
+        for resource, value in self.values.items():
+            if isinstance(resource, FloorLayer):
+                attr = resource.layer.value
+                for z, layer_rows in value.items():
+                    _apply_layer(board.floors[z].rows, attr, layer_rows)
+                if resource.layer is BoardLayer.LABELS:
+                    board.recompute_labels_map()
+            elif value is None:
+                board.remove_meta(resource.key)
+            else:
+                board.set_meta(resource.key, value)
+
+
+def _apply_layer(rows: Iterable[Iterable[TileData]], attr: str, layer_rows: list[list[Any]]) -> None:
+    for row, layer_row in zip(rows, layer_rows):
+        for tile, value in zip(row, layer_row):
+            setattr(tile, attr, value)
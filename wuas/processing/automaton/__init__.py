@@ -0,0 +1,168 @@
+
+"""A generic cellular automaton, whose rules are given declaratively
+in the "automaton" key of the configuration metadata rather than in
+Python code.
+
+Every generation, all spaces on each floor are updated simultaneously
+based on the spaces in their neighborhood before the update. The rules
+are tried in order, and the first rule that applies to a space decides
+its new value. A rule whose chance roll fails does not apply, so later
+rules are still tried. Spaces matching no rule keep their current
+value. See specs/config-schema.json for the format of the rules.
+
+The rules are compiled once into arrays of space codes, and each
+generation is evaluated with array operations over the integer grid of
+each floor (see wuas.grid).
+
+"""
+
+from __future__ import annotations
+
+from wuas.processing.automaton.config import (
+    AutomatonConfig, AutomatonRule, CountCondition, Exclusion, Outcome,
+    FixedOutcome, ChoiceOutcome, AdjacentOutcome,
+)
+from wuas.processing.abc import RandomizedProcessor
+from wuas.processing.access import BoardAccess, BoardLayer, FloorLayer
+from wuas.processing.registry import registered_processor
+from wuas.board import Board, Floor
+from wuas.config import ConfigFile
+from wuas.grid import SpacePalette, IntGrid, BoolGrid, count_neighbors
+
+import numpy as np
+import numpy.typing as npt
+
+from dataclasses import dataclass
+
+
+@registered_processor(aliases=["automaton"])
+class AutomatonProcessor(RandomizedProcessor):
+    """Runs one generation of the cellular automaton specified in the
+    configuration metadata."""
+
+    def access(self) -> BoardAccess:
+        # Tokens and attributes can exclude a space from a rule.
+        return BoardAccess.of(
+            reads=[FloorLayer(layer) for layer in (BoardLayer.SPACES, BoardLayer.TOKENS, BoardLayer.ATTRIBUTES)],
+            writes=[FloorLayer(BoardLayer.SPACES)],
+        )
+
+    def run(self, config: ConfigFile, board: Board) -> None:
+        automaton_config = AutomatonConfig.from_json(config.meta['automaton'])
+        engine = AutomatonEngine(automaton_config, rng=self.random_streams.generator())
+        engine.step(board)
+
+
+class AutomatonEngine:
+    """An AutomatonConfig compiled against a space palette. The engine
+    can be reused for any number of generations and boards."""
+    _config: AutomatonConfig
+    _palette: SpacePalette
+    _rng: np.random.Generator
+    _rules: list[_CompiledRule]
+
+    def __init__(self, config: AutomatonConfig, rng: np.random.Generator | None = None) -> None:
+        self._config = config
+        self._palette = SpacePalette()
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._rules = [self._compile_rule(rule) for rule in config.rules]
+
+    def step(self, board: Board) -> None:
+        """Run a single generation on every floor of the board."""
+        for floor in board.floors.values():
+            grid = self._palette.encode(floor)
+            new_grid = self._step_floor(board, floor, grid)
+            self._palette.decode_into(floor, new_grid, grid)
+
+    def _compile_rule(self, rule: AutomatonRule) -> _CompiledRule:
+        return _CompiledRule(
+            rule=rule,
+            from_codes=self._codes(rule.from_spaces),
+            outcome_codes=self._codes(_outcome_spaces(rule.outcome)),
+        )
+
+    def _codes(self, names: tuple[str, ...]) -> npt.NDArray[np.int32]:
+        return np.array(self._palette.codes(names), dtype=np.int32)
+
+    def _step_floor(self, board: Board, floor: Floor, grid: IntGrid) -> IntGrid:
+        neighbor_counts: dict[str, IntGrid] = {}
+
+        def count(category: str) -> IntGrid:
+            # Each category is only counted once per floor, no matter
+            # how many rules refer to it.
+            if category not in neighbor_counts:
+                mask = np.isin(grid, self._codes(self._config.category(category)))
+                neighbor_counts[category] = count_neighbors(mask, self._config.neighborhood)
+            return neighbor_counts[category]
+
+        result = grid.copy()
+        decided = self._exclusion_mask(board, floor, grid, self._config.exclude)
+        for compiled in self._rules:
+            rule = compiled.rule
+            applies = np.isin(grid, compiled.from_codes) & ~decided
+            for condition in rule.conditions:
+                applies &= _check_condition(condition, count(condition.category))
+            if not rule.exceptions.is_empty():
+                applies &= ~self._exclusion_mask(board, floor, grid, rule.exceptions)
+
+            if isinstance(rule.outcome, AdjacentOutcome):
+                present = np.stack([count(name) > 0 for name in rule.outcome.spaces])
+                applies &= present.any(axis=0)
+
+            ys, xs = np.nonzero(applies)
+            if rule.chance < 1.0:
+                succeeds = self._rng.random(len(ys)) < rule.chance
+                ys, xs = ys[succeeds], xs[succeeds]
+            decided[ys, xs] = True
+
+            match rule.outcome:
+                case FixedOutcome():
+                    result[ys, xs] = compiled.outcome_codes[0]
+                case ChoiceOutcome():
+                    choices = self._rng.integers(len(compiled.outcome_codes), size=len(ys))
+                    result[ys, xs] = compiled.outcome_codes[choices]
+                case AdjacentOutcome():
+                    candidates = present[:, ys, xs]
+                    picks = self._rng.integers(candidates.sum(axis=0))
+                    choices = np.argmax(candidates.cumsum(axis=0) > picks, axis=0)
+                    result[ys, xs] = compiled.outcome_codes[choices]
+        return result
+
+    def _exclusion_mask(self, board: Board, floor: Floor, grid: IntGrid, exclusion: Exclusion) -> BoolGrid:
+        mask = np.isin(grid, self._codes(tuple(exclusion.spaces)))
+        # Attributes and tokens are stored by abbreviation, so find
+        # the abbreviations for the excluded names first.
+        attribute_ids = {ref for ref, attr in board.attributes.items() if attr.name in exclusion.attributes}
+        token_ids = {ref for ref, token in board.tokens.items() if token.name in exclusion.tokens}
+        if attribute_ids or token_ids:
+            tile_mask = [
+                [not attribute_ids.isdisjoint(tile.attribute_ids) or not token_ids.isdisjoint(tile.token_ids)
+                 for tile in row]
+                for row in floor.rows
+            ]
+            mask |= np.array(tile_mask, dtype=np.bool_).reshape(grid.shape)
+        return mask
+
+
+@dataclass(frozen=True)
+class _CompiledRule:
+    rule: AutomatonRule
+    from_codes: npt.NDArray[np.int32]
+    outcome_codes: npt.NDArray[np.int32]
+
+
+def _check_condition(condition: CountCondition, counts: IntGrid) -> BoolGrid:
+    result = counts >= condition.minimum
+    if condition.maximum is not None:
+        result &= counts <= condition.maximum
+    if condition.allowed is not None:
+        result &= np.isin(counts, list(condition.allowed))
+    return result
+
+
+def _outcome_spaces(outcome: Outcome) -> tuple[str, ...]:
+    match outcome:
+        case FixedOutcome(space=space):
+            return (space,)
+        case ChoiceOutcome(spaces=spaces) | AdjacentOutcome(spaces=spaces):
+            return spaces
@@ -0,0 +1,164 @@
+
+from __future__ import annotations
+
+from wuas.grid import MOORE_NEIGHBORHOOD, VON_NEUMANN_NEIGHBORHOOD
+
+from dataclasses import dataclass
+from typing import Any
+
+NAMED_NEIGHBORHOODS = {
+    'moore': MOORE_NEIGHBORHOOD,
+    'von_neumann': VON_NEUMANN_NEIGHBORHOOD,
+}
+
+
+@dataclass(frozen=True)
+class AutomatonConfig:
+    """The portion of the configuration metadata which specifies the
+    rules of a cellular automaton."""
+    neighborhood: tuple[tuple[int, int], ...]
+    categories: dict[str, tuple[str, ...]]
+    exclude: Exclusion
+    rules: tuple[AutomatonRule, ...]
+
+    @classmethod
+    def from_json(cls, json_data: Any) -> AutomatonConfig:
+        categories = {
+            name: _parse_names(members)
+            for name, members in json_data.get('categories', {}).items()
+        }
+        return cls(
+            neighborhood=_parse_neighborhood(json_data.get('neighborhood', 'moore')),
+            categories=categories,
+            exclude=Exclusion.from_json(json_data.get('exclude', {})),
+            rules=tuple(AutomatonRule.from_json(rule) for rule in json_data['rules']),
+        )
+
+    def category(self, name: str) -> tuple[str, ...]:
+        """The space names belonging to the given category. Any name
+        which is not explicitly a category is treated as a category
+        containing only the space of that name."""
+        return self.categories.get(name, (name,))
+
+
+@dataclass(frozen=True)
+class Exclusion:
+    """A set of conditions which exempt a space from change, in the
+    style of fireproof spaces. A space is excluded if it has any of
+    the given space names, or has any of the given attributes or
+    tokens (by name, not abbreviation) on it."""
+    spaces: frozenset[str] = frozenset()
+    attributes: frozenset[str] = frozenset()
+    tokens: frozenset[str] = frozenset()
+
+    @classmethod
+    def from_json(cls, json_data: Any) -> Exclusion:
+        return cls(
+            spaces=frozenset(_parse_names(json_data.get('spaces', []))),
+            attributes=frozenset(_parse_names(json_data.get('attributes', []))),
+            tokens=frozenset(_parse_names(json_data.get('tokens', []))),
+        )
+
+    def is_empty(self) -> bool:
+        return not (self.spaces or self.attributes or self.tokens)
+
+
+@dataclass(frozen=True)
+class AutomatonRule:
+    """A single transition rule. The rule applies to spaces whose
+    current name is one of from_spaces, which satisfy all of the
+    conditions, and which are not exempted by exceptions. If chance is
+    less than one, then the rule only applies with that probability."""
+    from_spaces: tuple[str, ...]
+    conditions: tuple[CountCondition, ...]
+    outcome: Outcome
+    chance: float = 1.0
+    exceptions: Exclusion = Exclusion()
+
+    @classmethod
+    def from_json(cls, json_data: Any) -> AutomatonRule:
+        chance = float(json_data.get('chance', 1.0))
+        if not 0.0 <= chance <= 1.0:
+            raise ValueError(f"Invalid rule chance {chance}")
+        return cls(
+            from_spaces=_parse_names(json_data['from']),
+            conditions=tuple(CountCondition.from_json(cond) for cond in json_data.get('when', [])),
+            outcome=_parse_outcome(json_data['to']),
+            chance=chance,
+            exceptions=Exclusion.from_json(json_data.get('except', {})),
+        )
+
+
+@dataclass(frozen=True)
+class CountCondition:
+    """A condition on the number of neighbors of a space which belong
+    to the given category. The count must be at least minimum, at most
+    maximum (if given), and one of allowed (if given)."""
+    category: str
+    minimum: int = 0
+    maximum: int | None = None
+    allowed: frozenset[int] | None = None
+
+    @classmethod
+    def from_json(cls, json_data: Any) -> CountCondition:
+        allowed = json_data.get('in')
+        return cls(
+            category=json_data['count'],
+            minimum=int(json_data.get('min', 0)),
+            maximum=int(json_data['max']) if 'max' in json_data else None,
+            allowed=frozenset(int(n) for n in allowed) if allowed is not None else None,
+        )
+
+
+@dataclass(frozen=True)
+class FixedOutcome:
+    """The space becomes the given space."""
+    space: str
+
+
+@dataclass(frozen=True)
+class ChoiceOutcome:
+    """The space becomes one of the given spaces, uniformly at
+    random."""
+    spaces: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class AdjacentOutcome:
+    """The space becomes one of the given spaces which appear in its
+    neighborhood, chosen uniformly among the distinct spaces present.
+    A rule with this outcome only applies if at least one of them is
+    present."""
+    spaces: tuple[str, ...]
+
+
+type Outcome = FixedOutcome | ChoiceOutcome | AdjacentOutcome
+
+
+def _parse_outcome(json_data: Any) -> Outcome:
+    if isinstance(json_data, str):
+        return FixedOutcome(json_data)
+    elif 'choice' in json_data:
+        return ChoiceOutcome(_parse_names(json_data['choice']))
+    elif 'adjacent' in json_data:
+        return AdjacentOutcome(_parse_names(json_data['adjacent']))
+    else:
+        raise ValueError(f"Invalid rule outcome {json_data!r}")
+
+
+def _parse_neighborhood(json_data: Any) -> tuple[tuple[int, int], ...]:
+    if isinstance(json_data, str):
+        try:
+            return NAMED_NEIGHBORHOODS[json_data]
+        except KeyError:
+            raise ValueError(f"Invalid neighborhood {json_data!r}") from None
+    return tuple((int(dx), int(dy)) for dx, dy in json_data)
+
+
+def _parse_names(json_data: Any) -> tuple[str, ...]:
+    # A single name is accepted in place of a list of names.
+    if isinstance(json_data, str):
+        return (json_data,)
+    if not all(isinstance(name, str) for name in json_data):
+        raise ValueError(f"Expected a list of names, got {json_data!r}")
+    return tuple(json_data)
@@ -3,14 +3,13 @@
 
 from __future__ import annotations
 
-from wuas.processing.abc import BoardProcessor
-from wuas.board import Board
+from wuas.processing.abc import RandomizedProcessor, TileVisitorProcessor
+from wuas.processing.access import BoardAccess, BoardLayer, FloorLayer
+from wuas.board import Board, TileData
 from wuas.floornumber import FloorNumber
 from wuas.config import ConfigFile
 from wuas.processing.registry import registered_processor
 
-import random
-
 MCOTW = (
     FloorNumber(-100),
     FloorNumber(-101),
@@ -19,19 +18,61 @@ MCOTW = (
 
 
 @registered_processor
-class BanishOuterRingProcessor(BoardProcessor):
+class BanishOuterRingProcessor(RandomizedProcessor, TileVisitorProcessor):
+    """Turns the outer ring of the ground floor to ash, and sends each
+    tile of the ring to a random floor of the MCotW as fire. The random
+    choices depend only on the dimensions of the board, so they are
+    made in prepare, and the processor can share a traversal with
+    other tile visitors."""
+    _width: int
+    _height: int
+    _fire_masks: dict[FloorNumber, list[list[bool]]]
+
+    def access(self) -> BoardAccess:
+        return BoardAccess.of(writes=[
+            FloorLayer(BoardLayer.SPACES, FloorNumber(0)),
+            *(FloorLayer(BoardLayer.SPACES, z) for z in MCOTW),
+        ])
+
+    def prepare(self, config: ConfigFile, board: Board) -> None:
+        missing_floors = [z for z in (FloorNumber(0), *MCOTW) if z not in board.floors]
+        if missing_floors:
+            raise KeyError(missing_floors[0])
+        self._width = board.width
+        self._height = board.height
+        self._fire_masks = {z: [[False] * board.width for _ in range(board.height)] for z in MCOTW}
+        ring_visits = _ring_visits(board)
+        choices = self.random_streams.generator().integers(len(MCOTW), size=len(ring_visits))
+        for (x, y), choice in zip(ring_visits, choices):
+            self._fire_masks[MCOTW[choice]][y][x] = True
+
+    def visit(self, x: int, y: int, z: FloorNumber, tile: TileData) -> None:
+        if z == FloorNumber(0):
+            if x in (0, self._width - 1) or y in (0, self._height - 1):
+                tile.space_name = "ash"
+        elif z in self._fire_masks and self._fire_masks[z][y][x]:
+            tile.space_name = "fire"
 
     def run(self, config: ConfigFile, board: Board) -> None:
-        for i in range(board.width):
-            # Top and bottom
-            self._migrate(board, i, 0)
-            self._migrate(board, i, board.height - 1)
-        for j in range(board.height):
-            # Left and right
-            self._migrate(board, 0, j)
-            self._migrate(board, board.width - 1, j)
-
-    def _migrate(self, board: Board, x: int, y: int) -> None:
-        new_z = random.choice(MCOTW)
-        board.get_space(x, y, FloorNumber(0)).space_name = "ash"
-        board.get_space(x, y, new_z).space_name = "fire"
+        # On its own, only the ring and the fire masks need to be
+        # touched, rather than every tile of the board.
+        self.prepare(config, board)
+        board.floors[FloorNumber(0)].fill_ring("ash")
+        for z, fire_mask in self._fire_masks.items():
+            board.floors[z].map_space_names(lambda _: "fire", where=fire_mask)
+        self.finish(config, board)
+
+
+def _ring_visits(board: Board) -> list[tuple[int, int]]:
+    # Each corner is visited twice, and so gets two chances to send
+    # fire to the MCotW.
+    visits = []
+    for i in range(board.width):
+        # Top and bottom
+        visits.append((i, 0))
+        visits.append((i, board.height - 1))
+    for j in range(board.height):
+        # Left and right
+        visits.append((0, j))
+        visits.append((board.width - 1, j))
+    return visits
@@ -12,5 +12,8 @@ from wuas.processing.registry import registered_processor
 @registered_processor
 class SpawnFireProcessor(BoardProcessor):
 
+    def cache_key(self) -> str | None:
+        return ''
+
     def run(self, config: ConfigFile, board: Board) -> None:
         board.resize(1, 1, 1, 1, "fire")
@@ -3,21 +3,22 @@
 
 from __future__ import annotations
 
-from wuas.processing.abc import BoardProcessor
+from wuas.processing.abc import RandomizedProcessor
 from wuas.board import Board
 from wuas.config import ConfigFile
 from wuas.processing.registry import registered_processor
 
-import random
+SPAWNED_TERRAIN = ('tree', 'dirt', 'grass')
 
 
 @registered_processor
-class SpawnTerrainProcessor(BoardProcessor):
+class SpawnTerrainProcessor(RandomizedProcessor):
 
     def run(self, config: ConfigFile, board: Board) -> None:
         board.resize(3, 3, 3, 3, "")
-        for floor in board.floors.values():
-            for x, y in floor.indices:
-                space = floor.get_space(x, y)
-                if space.space_name == '':
-                    space.space_name = random.choice(['tree', 'dirt', 'grass'])
+        for z, floor in board.floors.items():
+            rng = self.random_streams.generator('floor', z.name)
+            floor.map_space_names(
+                lambda _: SPAWNED_TERRAIN[rng.integers(len(SPAWNED_TERRAIN))],
+                where=lambda space_name: space_name == 'gap',
+            )
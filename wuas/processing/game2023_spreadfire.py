@@ -3,15 +3,18 @@
 
 from __future__ import annotations
 
-from wuas.processing.abc import BoardProcessor
-from wuas.board import Board, Space, Attribute
+from wuas.processing.abc import RandomizedProcessor
+from wuas.processing.access import BoardAccess, BoardLayer, FloorLayer
+from wuas.board import Board, TileData, ConcreteToken
 from wuas.floornumber import FloorNumber
-from wuas.config import ConfigFile
+from wuas.config import ConfigFile, normalize_space_name
 from wuas.processing.registry import registered_processor
 from wuas.util import manhattan_circle
 
-from typing import Iterable
-import random
+from typing import Sequence
+from collections import defaultdict
+
+import numpy as np
 
 # I'm not going to pretend this fits into some .json configuration data. I'm
 # special-casing the rules.
@@ -24,69 +27,157 @@ MCOTW = (
 
 INTRINSICALLY_FIREPROOF = ('start', 'altar', 'water', 'twater', 'ttree')
 
+type Position = tuple[int, int, FloorNumber]
+
 
 @registered_processor(aliases=["fire2023"])
-class FireSpreadProcessor(BoardProcessor):
+class FireSpreadProcessor(RandomizedProcessor):
+    """Every fire space spreads to the non-fireproof spaces within
+    Manhattan distance 1 of it (or 2, if it is adjacent to another
+    fire space), and is then banished to a random floor of the MCotW.
+
+    The engine only visits the neighborhoods of fire spaces, using
+    precomputed offset tables, so the cost of a turn scales with the
+    amount of fire rather than the size of the board."""
+
+    def access(self) -> BoardAccess:
+        # Tokens and attributes can make a space fireproof.
+        return BoardAccess.of(
+            reads=[FloorLayer(layer) for layer in (BoardLayer.SPACES, BoardLayer.TOKENS, BoardLayer.ATTRIBUTES)],
+            writes=[FloorLayer(BoardLayer.SPACES)],
+        )
 
     def run(self, config: ConfigFile, board: Board) -> None:
-        # Identify all of the current fire spaces.
-        fire_spaces = list(_find_fire_spaces(board))
-        # Now spread them all.
+        engine = FireEngine(board)
+        # Spread each of the current fire spaces, in board order.
+        fire_spaces = engine.fire_spaces()
         for fire_space in fire_spaces:
-            _do_fire_spread(board, fire_space)
+            engine.spread(fire_space)
         # Banish the fire spaces that were here from the start.
+        engine.banish([(x, y, z) for x, y, z in fire_spaces if z not in MCOTW], self.random_streams.generator())
+
+
+class FireEngine:
+    """The fire state of a board. Maintains the set of fire spaces and
+    a fireproof mask, both computed in a single pass over the board
+    and kept up to date as fire spreads.
+
+    Fireproofing is never affected by the spread of fire (a fireproof
+    space never catches fire, and a space which catches fire was not
+    fireproof to begin with), so the mask never needs to be
+    recomputed during a turn."""
+    _board: Board
+    _rows: dict[FloorNumber, Sequence[Sequence[TileData]]]
+    _fire: set[Position]
+    _fire_order: list[Position]
+    _fireproof: dict[FloorNumber, list[list[bool]]]
+    # Offsets reachable from each floor at each distance, keyed by
+    # (floor, distance), as (dx, dy, target floor) triples.
+    _offsets: dict[tuple[FloorNumber, int], list[tuple[int, int, FloorNumber]]]
+
+    def __init__(self, board: Board) -> None:
+        self._board = board
+        self._rows = {}
+        self._fire = set()
+        self._fire_order = []
+        self._fireproof = {}
+        self._offsets = {}
+        is_fireproof = _FireproofTest(board)
+        for z in sorted(board.floors):
+            rows = self._rows[z] = board.floors[z].rows
+            self._fireproof[z] = [[is_fireproof(tile) for tile in row] for row in rows]
+            for y, row in enumerate(rows):
+                for x, tile in enumerate(row):
+                    if tile.space_name == 'fire':
+                        self._fire.add((x, y, z))
+                        self._fire_order.append((x, y, z))
+
+    def fire_spaces(self) -> list[Position]:
+        """The fire spaces present when this engine was constructed, in
+        the order of board.indices."""
+        return list(self._fire_order)
+
+    def spread(self, fire_space: Position) -> None:
+        distance = 2 if self._is_super_fire_space(fire_space) else 1
+        for x, y, z in self._circle(fire_space, distance):
+            if not self._fireproof[z][y][x] and (x, y, z) not in self._fire:
+                self._rows[z][y][x].space_name = 'fire'
+                self._fire.add((x, y, z))
+
+    def banish(self, fire_spaces: list[Position], rng: np.random.Generator) -> None:
+        """Turn each of the given spaces to ash, and send its fire to a
+        random non-fireproof MCotW floor at the same X/Y position. The
+        random choices are made in one batch for each distinct set of
+        available floors."""
+        mcotw_floors = [floor for floor in MCOTW if floor in self._rows]
+        pending: defaultdict[tuple[FloorNumber, ...], list[tuple[int, int]]] = defaultdict(list)
         for x, y, z in fire_spaces:
-            if z not in MCOTW:
-                _banish(board, x, y, z)
-
-
-def _find_fire_spaces(board: Board) -> Iterable[tuple[int, int, FloorNumber]]:
-    for x, y, z in board.indices:
-        if board.get_space(x, y, z).space_name == 'fire':
-            yield x, y, z
-
-
-def _do_fire_spread(board: Board, fire_space: tuple[int, int, FloorNumber]) -> None:
-    distance = 2 if _is_super_fire_space(board, fire_space) else 1
-    for x, y, z in manhattan_circle(fire_space, distance):
-        if not board.in_bounds(x, y, z):
-            continue
-        space = board.get_space(x, y, z)
-        if not _is_fireproof(space):
-            space.space_name = 'fire'
-
-
-def _is_super_fire_space(board: Board, fire_space: tuple[int, int, FloorNumber]) -> bool:
-    adjacent_spaces = [
-        board.get_space(x, y, z).space_name
-        for x, y, z in manhattan_circle(fire_space, 1)
-        if board.in_bounds(x, y, z)
-    ]
-    fire_count = adjacent_spaces.count('fire')
-    # One of the spaces will always be the current one we're looking
-    # at, so if there's more than one, then it's super spreading.
-    return fire_count > 1
-
-
-def _is_fireproof(space: Space) -> bool:
-    if Attribute("fireproof") in space.get_attributes():
-        return True
-    if space.space_name in INTRINSICALLY_FIREPROOF:
-        return True
-    if 'goldcoin' in [token.token_name for token in space.get_concrete_tokens()]:
-        return True
-    if space.space_name == 'ash' and 'smolderingimmunity' not in space.attribute_ids:
-        return True
-    return False
-
-
-def _banish(board: Board, x: int, y: int, z: FloorNumber) -> None:
-    new_z_choices = [
-        floor
-        for floor in MCOTW
-        if board.in_bounds(x, y, floor) and not _is_fireproof(board.get_space(x, y, floor))
-    ]
-    board.get_space(x, y, z).space_name = "ash"
-    if new_z_choices:
-        new_z = random.choice(new_z_choices)
-        board.get_space(x, y, new_z).space_name = "fire"
+            self._rows[z][y][x].space_name = 'ash'
+            self._fire.discard((x, y, z))
+            new_z_choices = tuple(floor for floor in mcotw_floors if not self._fireproof[floor][y][x])
+            if new_z_choices:
+                pending[new_z_choices].append((x, y))
+        for new_z_choices, positions in pending.items():
+            choices = rng.integers(len(new_z_choices), size=len(positions))
+            for (x, y), choice in zip(positions, choices):
+                new_z = new_z_choices[choice]
+                self._rows[new_z][y][x].space_name = 'fire'
+                self._fire.add((x, y, new_z))
+
+    def _is_super_fire_space(self, fire_space: Position) -> bool:
+        fire_count = sum(1 for position in self._circle(fire_space, 1) if position in self._fire)
+        # One of the spaces will always be the current one we're looking
+        # at, so if there's more than one, then it's super spreading.
+        return fire_count > 1
+
+    def _circle(self, origin: Position, distance: int) -> list[Position]:
+        # Equivalent to manhattan_circle, restricted to the board's
+        # bounds. Note that positions can repeat on the infinity floor,
+        # since infinity plus any offset is still infinity.
+        x0, y0, z0 = origin
+        width = self._board.width
+        height = self._board.height
+        return [
+            (x0 + dx, y0 + dy, z)
+            for dx, dy, z in self._offset_table(z0, distance)
+            if 0 <= x0 + dx < width and 0 <= y0 + dy < height
+        ]
+
+    def _offset_table(self, z0: FloorNumber, distance: int) -> list[tuple[int, int, FloorNumber]]:
+        key = (z0, distance)
+        if key not in self._offsets:
+            self._offsets[key] = [
+                (dx, dy, z)
+                for dx, dy, z in manhattan_circle((0, 0, z0), distance)
+                if z in self._rows
+            ]
+        return self._offsets[key]
+
+
+class _FireproofTest:
+    """Determines whether a tile is fireproof. Attribute and token
+    abbreviations are resolved once up front, rather than once per
+    tile."""
+    _fireproof_attribute_ids: frozenset[str]
+    _gold_coin_ids: frozenset[str]
+
+    def __init__(self, board: Board) -> None:
+        self._fireproof_attribute_ids = frozenset(
+            ref for ref, attr in board.attributes.items() if attr.name == 'fireproof'
+        )
+        self._gold_coin_ids = frozenset(
+            ref for ref, token in board.tokens.items()
+            if isinstance(token, ConcreteToken) and token.token_name == 'goldcoin'
+        )
+
+    def __call__(self, tile: TileData) -> bool:
+        space_name = normalize_space_name(tile.space_name)
+        if not self._fireproof_attribute_ids.isdisjoint(tile.attribute_ids):
+            return True
+        if space_name in INTRINSICALLY_FIREPROOF:
+            return True
+        if not self._gold_coin_ids.isdisjoint(tile.token_ids):
+            return True
+        if space_name == 'ash' and 'smolderingimmunity' not in tile.attribute_ids:
+            return True
+        return False
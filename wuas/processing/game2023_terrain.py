@@ -3,94 +3,91 @@
 
 from __future__ import annotations
 
-from wuas.processing.abc import BoardProcessor
-from wuas.board import Board, Floor, Space
+from wuas.processing.abc import RandomizedProcessor
+from wuas.processing.access import BoardAccess, BoardLayer, FloorLayer
+from wuas.board import Board, Floor
 from wuas.config import ConfigFile
+from wuas.grid import SpacePalette, IntGrid, BoolGrid, count_neighbors
 from wuas.processing.registry import registered_processor
 
-from copy import deepcopy
-import random
+import numpy as np
 
 # I'm not going to pretend this fits into some .json configuration data. I'm
 # special-casing the rules.
 
+# Spaces which count as grass for the purposes of growth.
+GRASS_SPACES = ('grass', 'tgrass')
+
+# Spaces which ash will absorb if it is adjacent to them.
+ASH_ABSORBS = ('grass', 'tree', 'water', 'tgrass', 'ttree', 'twater')
+
+ASH_DECAY_CHANCE = 0.33
+
 
 @registered_processor(aliases=["terrain2023"])
-class TerrainProcessor(BoardProcessor):
+class TerrainProcessor(RandomizedProcessor):
+    """Runs one generation of the terrain cellular automaton. Every
+    space is updated simultaneously, based on the eight spaces
+    surrounding it before the update. Positions off the edge of the
+    board count as gaps.
+
+    Each floor is encoded as an integer grid and updated with array
+    operations, so the cost of the per-tile rules does not depend on
+    Python-level iteration. Each floor draws from its own random
+    stream."""
+
+    def access(self) -> BoardAccess:
+        return BoardAccess.of(
+            reads=[FloorLayer(BoardLayer.SPACES), FloorLayer(BoardLayer.ATTRIBUTES)],
+            writes=[FloorLayer(BoardLayer.SPACES)],
+        )
 
     def run(self, config: ConfigFile, board: Board) -> None:
-        original_board = deepcopy(board)
+        palette = SpacePalette()
         for z, floor in board.floors.items():
-            for x, y in floor.indices:
-                space = floor.get_space(x, y)
-                adjacent = _get_adjacent_spaces(original_board.floors[z], x, y)
-                space.space_name = _evaluate_terrain(space, adjacent)
-
-
-def _get_adjacent_spaces(floor: Floor, x: int, y: int) -> list[str]:
-    result = []
-    targets = [
-        (x - 1, y - 1), (x    , y - 1), (x + 1, y - 1),  # noqa: E202, E203
-        (x - 1, y    ),                 (x + 1, y    ),  # noqa: E202, E203
-        (x - 1, y + 1), (x    , y + 1), (x + 1, y + 1),  # noqa: E202, E203
-    ]
-    for target in targets:
-        tx, ty = target
-        if floor.in_bounds(tx, ty):
-            result.append(floor.get_space(tx, ty).space_name)
-        else:
-            result.append("gap")
-    return result
+            grid = palette.encode(floor)
+            new_grid = _evaluate_terrain(palette, floor, grid, self.random_streams.generator('floor', z.name))
+            palette.decode_into(floor, new_grid, grid)
+
 
+def _evaluate_terrain(palette: SpacePalette, floor: Floor, grid: IntGrid, rng: np.random.Generator) -> IntGrid:
+    code = palette.code
+    result = grid.copy()
 
-def _evaluate_terrain(current_space: Space, adjacent_spaces: list[str]) -> str:
-    space_name = current_space.space_name
-    match space_name:
-        case "ash":
-            # Ash spaces will absorb nearby grass, tree, and water spaces.
-            candidates = {"grass", "tree", "water", "tgrass", "ttree", "twater"} & set(adjacent_spaces)
-            if candidates:
-                return random.choice(list(candidates))
-            elif random.random() < 0.33 and 'smolderingimmunity' not in current_space.attribute_ids:
-                return "dirt"
-            else:
-                return "ash"
-        case "dirt":
-            grass_tiles = adjacent_spaces.count('grass') + adjacent_spaces.count('tgrass')
-            if 'water' in adjacent_spaces or grass_tiles in [2, 3]:
-                return 'grass'
-            else:
-                return 'dirt'
-        case "grass":
-            grass_tiles = adjacent_spaces.count('grass') + adjacent_spaces.count('tgrass')
-            if grass_tiles < 2:
-                return 'dirt'
-            elif grass_tiles > 3:
-                return 'tree'
-            else:
-                return 'grass'
-        case "tree":
-            grass_tiles = adjacent_spaces.count('grass') + adjacent_spaces.count('tgrass')
-            if 'ttree' in adjacent_spaces:
-                return 'ttree'
-            elif grass_tiles <= 1:
-                return 'grass'
-            else:
-                return 'tree'
-        case "tdirt":
-            grass_tiles = adjacent_spaces.count('grass') + adjacent_spaces.count('tgrass')
-            if 'water' in adjacent_spaces or grass_tiles in [2, 3]:
-                return 'tgrass'
-            else:
-                return 'tdirt'
-        case "tgrass":
-            grass_tiles = adjacent_spaces.count('grass') + adjacent_spaces.count('tgrass')
-            if grass_tiles < 2:
-                return 'tdirt'
-            elif grass_tiles > 3:
-                return 'ttree'
-            else:
-                return 'tgrass'
-        case _:
-            # No expansion
-            return space_name
+    def is_near(*names: str) -> BoolGrid:
+        return count_neighbors(palette.mask(grid, names)) > 0
+
+    def transition(current: str, condition: BoolGrid, new: str) -> None:
+        result[(grid == code(current)) & condition] = code(new)
+
+    grass_tiles = count_neighbors(palette.mask(grid, GRASS_SPACES))
+    grows = is_near('water') | (grass_tiles == 2) | (grass_tiles == 3)
+    near_ttree = is_near('ttree')
+
+    transition('dirt', grows, 'grass')
+    transition('grass', grass_tiles < 2, 'dirt')
+    transition('grass', grass_tiles > 3, 'tree')
+    transition('tree', near_ttree, 'ttree')
+    transition('tree', ~near_ttree & (grass_tiles <= 1), 'grass')
+    transition('tdirt', grows, 'tgrass')
+    transition('tgrass', grass_tiles < 2, 'tdirt')
+    transition('tgrass', grass_tiles > 3, 'ttree')
+
+    # Ash spaces will absorb nearby grass, tree, and water spaces,
+    # choosing uniformly among the distinct kinds of space nearby.
+    ash = grid == code('ash')
+    candidates = np.stack([is_near(name) for name in ASH_ABSORBS])
+    candidate_count = candidates.sum(axis=0)
+    ys, xs = np.nonzero(ash & (candidate_count > 0))
+    picks = rng.integers(candidate_count[ys, xs])
+    chosen = np.argmax(candidates[:, ys, xs].cumsum(axis=0) > picks, axis=0)
+    result[ys, xs] = np.array(palette.codes(ASH_ABSORBS), dtype=np.int32)[chosen]
+
+    # Otherwise, ash has a chance to decay into dirt.
+    ys, xs = np.nonzero(ash & (candidate_count == 0))
+    decays = rng.random(len(ys)) < ASH_DECAY_CHANCE
+    for y, x in zip(ys[decays], xs[decays]):
+        if 'smolderingimmunity' not in floor.rows[y][x].attribute_ids:
+            result[y, x] = code('dirt')
+
+    return result
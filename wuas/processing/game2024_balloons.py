@@ -4,19 +4,20 @@
 from __future__ import annotations
 
 from wuas.config import ConfigFile
-from wuas.processing.abc import BoardProcessor
-from wuas.board import Board, Space, delete_token, move_token
-from wuas.floornumber import FloorNumber
+from wuas.processing.abc import RandomizedProcessor
+from wuas.processing.access import BoardAccess, BoardLayer, FloorLayer
+from wuas.board import Board, TokenMove
 from wuas.processing.registry import registered_processor
 
-from typing import Callable, ClassVar, Optional
+from typing import Callable, ClassVar
 from dataclasses import dataclass
-from collections import Counter
-import random
+
+import numpy as np
+import numpy.typing as npt
 
 
 @registered_processor(aliases=['balloons2024'])
-class BalloonMoveProcessor(BoardProcessor):
+class BalloonMoveProcessor(RandomizedProcessor):
     """Board processor which moves all tokens identifying as a balloon.
 
     The default processor identifies tokens with name "balloon" and
@@ -26,53 +27,57 @@ class BalloonMoveProcessor(BoardProcessor):
     Assumes the direction of gravity is UP. This script will have to
     be updated if that changes.
 
+    Every balloon on the board moves exactly once, simultaneously, so
+    the destinations are computed for all balloons at once and applied
+    as a single batch of moves.
+
     """
     config: BalloonMoveConfig
 
-    def __init__(self, config: BalloonMoveConfig | None = None) -> None:
+    def __init__(self, config: BalloonMoveConfig | None = None, seed: int | None = None) -> None:
+        """If seed is given, the balloons' speeds are reproducible."""
         if config is None:
             config = BalloonMoveConfig()
+        super().__init__(seed)
         self.config = config
 
+    def access(self) -> BoardAccess:
+        return BoardAccess.of(reads=[FloorLayer(BoardLayer.TOKENS)], writes=[FloorLayer(BoardLayer.TOKENS)])
+
+    def cache_key(self) -> str | None:
+        # A custom move speed is an arbitrary function, which has no
+        # stable identity to key on.
+        if self.config != BalloonMoveConfig.DEFAULT:
+            return None
+        return super().cache_key()
+
     def run(self, config: ConfigFile, board: Board) -> None:
-        _already_moved_balloons: Counter[tuple[int, int, FloorNumber]] = Counter()
-        for x, y, z in board.indices:
-            tile = board.get_space(x, y, z)
-            balloon_count = self._count_balloons(tile) - _already_moved_balloons[(x, y, z)]
-            for _ in range(balloon_count):
-                dest = self._move_balloon(board, src=(x, y, z))
-                if dest:
-                    _already_moved_balloons[dest] += 1
-
-    def _count_balloons(self, tile: Space) -> int:
-        count = 0
-        for token in tile.get_tokens():
-            if token.name == self.config.token_id:
-                count += 1
-        return count
-
-    def _move_balloon(
-            self,
-            board: Board, src: tuple[int, int, FloorNumber],
-    ) -> Optional[tuple[int, int, FloorNumber]]:
-        x, y, z = src
-        dest_y = y - self.config.move_speed()
-        if dest_y < 0:
+        balloon_refs = {ref for ref, token in board.tokens.items() if token.name == self.config.token_id}
+        balloons = board.token_positions(balloon_refs)
+        if not balloons:
+            return
+        ys = np.array([y for _, (_, y, _) in balloons])
+        dest_ys = ys - self.config.move_speed(self.random_streams.generator(), len(balloons))
+        if self.config.board_wraps:
             # If we're above the board AND the board wraps, then wrap.
             # Otherwise, delete but don't move.
-            if self.config.board_wraps:
-                dest_y += board.height
-            else:
-                delete_token(board, token_id=self.config.token_id, src=(x, y, z))
-                return None
-        move_token(board, token_id=self.config.token_id, src=(x, y, z), dest=(x, dest_y, z))
-        return (x, dest_y, z)
+            dest_ys = np.where(dest_ys < 0, dest_ys + board.height, dest_ys)
+        board.relocate_tokens(
+            TokenMove(ref=ref, src=(x, y, z), dest=(x, int(dest_y), z) if dest_y >= 0 else None)
+            for (ref, (x, y, z)), dest_y in zip(balloons, dest_ys)
+        )
+
+
+def _random_move_speed(rng: np.random.Generator, count: int) -> npt.NDArray[np.int64]:
+    return rng.integers(1, 3, size=count, endpoint=True)
 
 
 @dataclass
 class BalloonMoveConfig:
     token_id: str = "balloon"
-    move_speed: Callable[[], int] = lambda: random.randint(1, 3)
+    # Given a random number generator and a number of balloons,
+    # returns how far each balloon moves.
+    move_speed: Callable[[np.random.Generator, int], npt.NDArray[np.int64]] = _random_move_speed
     board_wraps: bool = True
 
     DEFAULT: ClassVar[BalloonMoveConfig]
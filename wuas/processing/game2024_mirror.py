@@ -14,38 +14,53 @@ should that player warp to the new mirrored position.
 
 from __future__ import annotations
 
-from wuas.board import Board, ConcreteToken, move_token
+from wuas.board import Board, ConcreteToken, TokenMove
 from wuas.floornumber import FloorNumber
 from wuas.config import ConfigFile, normalize_space_name
 from wuas.processing.registry import registered_processor
 from wuas.processing.mirror import MirrorProcessor
 
 import sys
-from typing import NamedTuple, Iterator
+from typing import NamedTuple
 from dataclasses import dataclass
 
 
 @registered_processor(aliases=['mirror2024'])
 class MirrorWithPlayersProcessor(MirrorProcessor):
+
+    def cache_key(self) -> str | None:
+        # The movement summary is printed as the processor runs.
+        return None
+
     def run(self, config: ConfigFile, board: Board) -> None:
         summary = self.run_with_summary(config, board)
         for explanation in summary:
             print(explanation.simple_message(), file=sys.stderr)
 
     def run_with_summary(self, config: ConfigFile, board: Board) -> list[MovementExplanation]:
-        super().run(config, board)
-        altar_x, _, _ = _find_altar(board)
-        tokens = list(_find_players(config, board))
+        player_refs = _player_refs(config, board)
+        index = self.mirror_board(config, board, watched_tokens=player_refs, watched_spaces={ALTAR_NAME})
+        try:
+            altar_x, _, _ = index.spaces[ALTAR_NAME]
+        except KeyError:
+            raise ValueError('Could not find altar in board')
         explanations = []
-        for player_token in tokens:
-            explanation = _try_to_move_back(
+        moves = []
+        for token_ref, pos in index.tokens:
+            player_token = PlayerToken(pos, token_id=board.tokens[token_ref].name, token_ref=token_ref)
+            explanation, move = _try_to_move_back(
                 config=config,
                 board=board,
                 altar_x=altar_x,
-                pos=player_token.pos,
-                token_id=player_token.token_id,
+                player_token=player_token,
             )
             explanations.append(explanation)
+            if move is not None:
+                moves.append(move)
+        # Each player's destination depends only on the spaces, which
+        # moving tokens does not change, so all moves can be applied
+        # together.
+        board.relocate_tokens(moves)
         return explanations
 
 
@@ -65,47 +80,42 @@ class MovementExplanation:
 class PlayerToken(NamedTuple):
     pos: tuple[int, int, FloorNumber]
     token_id: str
+    token_ref: str
 
 
-def _find_players(config: ConfigFile, board: Board) -> Iterator[PlayerToken]:
-    for x, y, z in board.indices:
-        for token_id in board.get_space(x, y, z).token_ids:
-            token = board.tokens[token_id]
-            if isinstance(token, ConcreteToken) and config.definitions.get_token(token.token_name).is_player():
-                yield PlayerToken((x, y, z), token_id=token.token_name)
-
-
-def _find_altar(board: Board) -> tuple[int, int, FloorNumber]:
-    for x, y, z in board.indices:
-        if board.get_space(x, y, z).space_name == ALTAR_NAME:
-            return x, y, z
-    raise ValueError('Could not find altar in board')
+def _player_refs(config: ConfigFile, board: Board) -> set[str]:
+    return {
+        token_ref
+        for token_ref, token in board.tokens.items()
+        if isinstance(token, ConcreteToken) and config.definitions.get_token(token.token_name).is_player()
+    }
 
 
 def _try_to_move_back(
         config: ConfigFile,
         board: Board,
         altar_x: int,
-        pos: tuple[int, int, FloorNumber],
-        token_id: str,
-) -> MovementExplanation:
+        player_token: PlayerToken,
+) -> tuple[MovementExplanation, TokenMove | None]:
     # We just mirrored everything, including player tokens. Try to
     # un-mirror this player token.
-    x, y, z = pos
+    x, y, z = player_token.pos
     dest_x = (2 * altar_x - x) % board.width
     dest_space = board.get_space(dest_x, y, z)
     space_name = normalize_space_name(dest_space.space_name)
+    move = None
     if space_name != GAP_NAME and space_name not in config.meta.get('mirrorsolids', []):
         # Move the player back to the destination.
-        move_token(board, token_id, src=(x, y, z), dest=(dest_x, y, z))
+        move = TokenMove(ref=player_token.token_ref, src=(x, y, z), dest=(dest_x, y, z))
         moved_with_board = False
     else:
         moved_with_board = True
-    return MovementExplanation(
-        player_id=token_id,
+    explanation = MovementExplanation(
+        player_id=player_token.token_id,
         moved_with_board=moved_with_board,
         space_at_original_coords=space_name,
     )
+    return explanation, move
 
 
 ALTAR_NAME = 'altar'
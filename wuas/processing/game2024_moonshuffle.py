@@ -4,18 +4,18 @@ Moon effect."""
 
 from __future__ import annotations
 
-from wuas.config import ConfigFile
-from wuas.processing.abc import BoardProcessor
-from wuas.board import Board, Token, HiddenToken, move_token
+from wuas.config import ConfigFile, normalize_space_name
+from wuas.processing.abc import RandomizedProcessor
+from wuas.processing.access import BoardAccess, BoardLayer, FloorLayer
+from wuas.board import Board, Token, HiddenToken, TokenMove
 from wuas.floornumber import FloorNumber
 from wuas.processing.registry import registered_processor
 
 from dataclasses import dataclass
-import random
 
 
 @registered_processor(aliases=['shuffle2024'])
-class MoonShuffleProcessor(BoardProcessor):
+class MoonShuffleProcessor(RandomizedProcessor):
     """Board processor which moves all non-player tokens to random
     positions on the board.
 
@@ -25,33 +25,57 @@ class MoonShuffleProcessor(BoardProcessor):
 
     """
 
+    def access(self) -> BoardAccess:
+        return BoardAccess.of(
+            reads=[FloorLayer(BoardLayer.SPACES), FloorLayer(BoardLayer.TOKENS)],
+            writes=[FloorLayer(BoardLayer.TOKENS)],
+        )
+
     def run(self, config: ConfigFile, board: Board) -> None:
-        tokens_to_move = _find_all_targets(config, board)
-        valid_destinations = _get_valid_destinations(board)
-        for token in tokens_to_move:
-            new_position = random.choice(valid_destinations)
-            move_token(
-                board=board,
-                token_id=token.token_id,
-                src=token.source_pos,
-                dest=new_position,
-            )
+        tokens_to_move, valid_destinations = _scan_board(config, board)
+        choices = self.random_streams.generator().integers(len(valid_destinations), size=len(tokens_to_move))
+        board.relocate_tokens(
+            TokenMove(ref=token.token_ref, src=token.source_pos, dest=valid_destinations[choice])
+            for token, choice in zip(tokens_to_move, choices)
+        )
 
 
 @dataclass(frozen=True)
 class TargetToken:
     source_pos: tuple[int, int, FloorNumber]
-    token_id: str
-
-
-def _find_all_targets(config: ConfigFile, board: Board) -> list[TargetToken]:
-    valid_targets = []
-    for pos in board.indices:
-        tile = board.get_space(pos)
-        for token in tile.get_tokens():
-            if _is_valid_target(config=config, token=token):
-                valid_targets.append(TargetToken(source_pos=pos, token_id=token.name))
-    return valid_targets
+    token_ref: str
+
+
+def _scan_board(
+        config: ConfigFile,
+        board: Board,
+) -> tuple[list[TargetToken], list[tuple[int, int, FloorNumber]]]:
+    """Find every token which should move and every valid destination,
+    in a single pass over the board. Both lists are in the order of
+    board.indices. Whether a token should move depends only on its
+    abbreviation, so that is decided the first time each abbreviation
+    is found on the board. Tokens which are defined but not placed on
+    the board are never looked up. Likewise, whether a space is a valid
+    destination is decided once per space name."""
+    is_target: dict[str, bool] = {}
+    is_destination: dict[str, bool] = {}
+    targets = []
+    destinations = []
+    for z, floor in sorted(board.floors.items(), key=lambda item: item[0]):
+        for y, row in enumerate(floor.rows):
+            for x, tile in enumerate(row):
+                pos = (x, y, z)
+                for ref in tile.token_ids:
+                    if ref not in is_target:
+                        is_target[ref] = _is_valid_target(config=config, token=board.tokens[ref])
+                    if is_target[ref]:
+                        targets.append(TargetToken(source_pos=pos, token_ref=ref))
+                space_name = tile.space_name
+                if space_name not in is_destination:
+                    is_destination[space_name] = normalize_space_name(space_name) not in ('start', 'altar')
+                if is_destination[space_name]:
+                    destinations.append(pos)
+    return targets, destinations
 
 
 def _is_valid_target(config: ConfigFile, token: Token) -> bool:
@@ -61,12 +85,3 @@ def _is_valid_target(config: ConfigFile, token: Token) -> bool:
         return False
     token_definition = config.definitions.get_token(token.token_name)
     return not token_definition.is_player()
-
-
-def _get_valid_destinations(board: Board) -> list[tuple[int, int, FloorNumber]]:
-    positions = []
-    for pos in board.indices:
-        tile = board.get_space(pos)
-        if tile.space_name not in ('start', 'altar'):
-            positions.append(pos)
-    return positions
@@ -8,27 +8,101 @@ from __future__ import annotations
 
 from wuas.processing.lighting.config import LightingConfig, Game2023LightSourceSupplier
 from wuas.processing.lighting.source import LightSourceSupplier
-from wuas.processing.abc import BoardProcessor
+from wuas.processing.lighting.state import LightingState, LightingFloorState, LightingGridCache
+from wuas.processing.abc import TileVisitorProcessor
+from wuas.processing.access import BoardAccess, BoardLayer, FloorLayer
 from wuas.processing.registry import registered_processor
-from wuas.board import Board
+from wuas.board import Board, TileData
 from wuas.floornumber import FloorNumber
-from wuas.config import ConfigFile
-from wuas.util import lerp, manhattan_circle
+from wuas.config import ConfigFile, normalize_space_name
+from wuas.grid import SpacePalette
+from wuas.hashing import board_hash
+from wuas.util import manhattan_circle
 
-from typing import Iterable
-import math
+from typing import Iterable, Iterator, Sequence, Container, Callable, Mapping
+from collections import defaultdict
+from functools import cache
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import os
+
+import numpy as np
+import numpy.typing as npt
 
 
 @registered_processor(aliases=["lighting"])
-class LightingProcessor(BoardProcessor):
+class LightingProcessor(TileVisitorProcessor):
+    """Lights the board and darkens every unlit space. If the lighting
+    configuration names a state_file, the state of the engine is saved
+    there after each run, and the next run only recomputes the parts
+    of the board whose lighting could have changed. If it names a
+    grid_cache, the computed light levels are saved there for use by
+    other tools.
 
-    def run(self, config: ConfigFile, board: Board) -> None:
+    The light levels are computed in prepare, which needs the whole
+    board, and the darkening is done one tile at a time, so it can
+    share a traversal with any tile visitors which follow."""
+    PREPARE_READS_BOARD = True
+
+    _engine: LightingEngine
+    _darkness: str
+    _lighting_cache: LightingGridCache | None
+
+    def access(self) -> BoardAccess:
+        # Darkening a space removes its tokens and attributes.
+        layers = [FloorLayer(layer) for layer in (BoardLayer.SPACES, BoardLayer.TOKENS, BoardLayer.ATTRIBUTES)]
+        return BoardAccess.of(reads=layers, writes=layers)
+
+    def cache_key(self) -> str | None:
+        # The state file and grid cache only save time on later runs;
+        # they never change the result.
+        return ''
+
+    def prepare(self, config: ConfigFile, board: Board) -> None:
         lighting_engine = LightingEngine(
             config=config,
             board=board,
         )
-        lighting_engine.compute_all_lights()
-        lighting_engine.darken_board()
+        state_file = lighting_engine.lighting_config.state_file
+        previous_state = None
+        if state_file is not None and os.path.exists(state_file):
+            try:
+                previous_state = LightingState.load(state_file)
+            except ValueError:
+                # A stale or corrupt state is no worse than none at all.
+                previous_state = None
+        if previous_state is None:
+            lighting_engine.compute_all_lights(workers=lighting_engine.lighting_config.workers)
+        else:
+            lighting_engine.recompute_lights(previous_state)
+        if state_file is not None:
+            lighting_engine.state().save(state_file)
+        self._engine = lighting_engine
+        self._darkness = lighting_engine.lighting_config.darkness
+        grid_cache = lighting_engine.lighting_config.grid_cache
+        self._lighting_cache = None if grid_cache is None else LightingGridCache(grid_cache)
+        if self._lighting_cache is not None:
+            # Cache the grid under the board both before and after
+            # darkening, so that it can be found from either one.
+            self._lighting_cache.store(board_hash(board), lighting_engine.light_levels())
+
+    def visit(self, x: int, y: int, z: FloorNumber, tile: TileData) -> None:
+        if self._engine.lighting_grid.floor_levels(z)[y][x] <= 0:
+            tile.space_name = self._darkness
+            tile.token_ids = []
+            tile.attribute_ids = []
+
+    def finish(self, config: ConfigFile, board: Board) -> None:
+        if self._lighting_cache is not None:
+            self._lighting_cache.store(board_hash(board), self._engine.light_levels())
+
+    def run(self, config: ConfigFile, board: Board) -> None:
+        # On its own, darken the whole board at once rather than
+        # visiting one tile at a time.
+        self.prepare(config, board)
+        self._engine.darken_board()
+        self.finish(config, board)
 
 
 class LightingEngine:
@@ -37,6 +111,17 @@ class LightingEngine:
     _lighting_grid: LightingGrid
     _lighting_config: LightingConfig
     _light_sources: LightSourceSupplier
+    _field: _LightField
+    # The light emitted by each space itself, before any adjacency
+    # rules are applied.
+    _source_levels: dict[FloorNumber, list[list[int]]]
+    # Index of the positions of every space targeted by an adjacency
+    # rule, and the set of positions which trigger one.
+    _adjacency_targets: dict[str, list[tuple[int, int, FloorNumber]]]
+    _adjacency_sources: dict[tuple[int, int, FloorNumber], str]
+    # The power emitted by the targets of each adjacency rule, as of
+    # the last computation.
+    _derived_powers: dict[str, int]
 
     def __init__(self, config: ConfigFile, board: Board) -> None:
         self._config = config
@@ -45,56 +130,529 @@ class LightingEngine:
         self._lighting_config = LightingConfig.from_json(config.meta['lighting'])
         # TODO Allow this to be constructed abstractly (as a ctor arg)
         self._light_sources = Game2023LightSourceSupplier(self._lighting_config, board)
+        self._field = _LightField(
+            width=board.width,
+            height=board.height,
+            floors=frozenset(board.floors),
+            dampening=_dampening_grid(self._lighting_config, board),
+        )
+        self._scan_board()
+        self._derived_powers = {}
+
+    @property
+    def lighting_config(self) -> LightingConfig:
+        return self._lighting_config
+
+    @property
+    def lighting_grid(self) -> LightingGrid:
+        return self._lighting_grid
+
+    def _scan_board(self) -> None:
+        adjacency = self._lighting_config.adjacency
+        target_names = set(adjacency.values())
+        self._source_levels = {}
+        self._adjacency_targets = defaultdict(list)
+        self._adjacency_sources = {}
+        for z, floor in self._board.floors.items():
+            levels = self._source_levels[z] = []
+            for y, row in enumerate(floor.rows):
+                level_row = []
+                for x, tile in enumerate(row):
+                    space_name = normalize_space_name(tile.space_name)
+                    if space_name in target_names:
+                        self._adjacency_targets[space_name].append((x, y, z))
+                    if space_name in adjacency:
+                        self._adjacency_sources[x, y, z] = adjacency[space_name]
+                    level_row.append(self._light_sources.get_light_source((x, y, z)))
+                levels.append(level_row)
+
+    def compute_all_lights(self, workers: int = 1) -> None:
+        """Compute the light level of every position on the board.
+
+        Emitters are processed in decreasing order of power from a
+        priority queue. A space with an adjacency rule which is lit to
+        level L causes every space named by that rule to emit light of
+        power L - 1. Since light never increases as it travels, such
+        derived emitters are always weaker than the emitter that
+        triggered them, so every position emits at most once, with its
+        final power.
+
+        If workers is greater than one, the emitters are instead
+        divided among that many processes (see _compute_in_parallel).
+        The result is the same either way."""
+        if workers > 1:
+            self._compute_in_parallel(workers)
+            return
+        self._lighting_grid = LightingGrid(self._board.width, self._board.height, self._board.floors)
+        self._derived_powers = self._propagate()
+
+    def _compute_in_parallel(self, workers: int) -> None:
+        """Compute every light level using a pool of processes.
+
+        The light level of a position is the maximum over all emitters
+        of the light each would give it alone, so emitters can be lit
+        in any grouping and the partial grids merged with a max.
+        Adjacency rules depend on the merged grid, so they are applied
+        in rounds: after each round, any adjacency rule whose sources
+        became brighter raises the power of its targets, which are then
+        lit in the next round, until nothing changes."""
+        emitters = {
+            position: level
+            for position in self._board.indices
+            if (level := self._source_level(position)) > 0
+        }
+        levels = {
+            z: np.zeros((self._board.height, self._board.width), dtype=np.int32)
+            for z in self._board.floors
+        }
+        derived_powers: dict[str, int] = {}
+        pending = dict(emitters)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self._field,))
+        with pool:
+            while pending:
+                for partial in pool.map(_light_partition, _partition_emitters(pending, workers * 4)):
+                    for z, partial_levels in partial.items():
+                        np.maximum(levels[z], partial_levels, out=levels[z])
+                pending = {}
+                for (x, y, z), target_name in self._adjacency_sources.items():
+                    derived_power = int(levels[z][y, x]) - 1
+                    if derived_power > derived_powers.get(target_name, 0):
+                        derived_powers[target_name] = derived_power
+                for target_name, derived_power in derived_powers.items():
+                    for position in self._adjacency_targets[target_name]:
+                        if derived_power > emitters.get(position, 0):
+                            emitters[position] = pending[position] = derived_power
+        self._lighting_grid = LightingGrid.from_levels({
+            z: floor_levels.tolist() for z, floor_levels in levels.items()
+        })
+        self._derived_powers = derived_powers
 
-    def compute_all_lights(self) -> None:
-        self._lighting_grid.is_dirty = True
-        while self._lighting_grid.is_dirty:
-            self._lighting_grid.reset_dirty_bit()
-            # Standard light sources
-            for x, y, z in self._board.indices:
-                light_level = self._light_sources.get_light_source((x, y, z))
-                if light_level > 0:
-                    self._do_light_emission((x, y, z), light_level)
-            # Custom adjacency rules
-            for x0, y0, z0 in self._board.indices:
-                space = self._board.get_space(x0, y0, z0)
-                adjacency_rule = self._lighting_config.adjacency.get(space.space_name, None)
-                if self._lighting_grid[x0, y0, z0] > 0 and adjacency_rule is not None:
-                    for x1, y1, z1 in self._board.indices:
-                        target_space = self._board.get_space(x1, y1, z1)
-                        if target_space.space_name == adjacency_rule:
-                            self._do_light_emission((x1, y1, z1), self._lighting_grid[x0, y0, z0] - 1)
-
-    def _do_light_emission(self, position: tuple[int, int, FloorNumber], power: int) -> None:
-        for distance in range(power):
-            for x, y, z in manhattan_circle(position, distance):
-                if self._board.in_bounds(x, y, z):
-                    # Check if anything diminishes the light
-                    dampened_light_level = power - distance
-                    if not z.is_infinite() and not position[2].is_infinite():
-                        x0, y0, z0 = position
-                        # At infinity, the concept of distance is
-                        # meaningless, so don't try to compute it.
-                        for x1, y1, z1 in _get_intersected_spaces((x0, y0, z0.as_integer()), (x, y, z.as_integer())):
-                            if (x1, y1, z1) == (x, y, z):
-                                # A dampening object will never dampen its own space.
-                                continue
-                            if not self._board.in_bounds(x, y, z):
-                                # The board isn't convex anymore, since
-                                # floors is a sparse array.
-                                continue
-                            space_name = self._board.get_space(x1, y1, FloorNumber(z1)).space_name
-                            dampen_factor = self._lighting_config.diminishing.get(space_name, 0)
-                            dampened_light_level -= dampen_factor
-                    self._lighting_grid.update((x, y, z), dampened_light_level)
+    def recompute_lights(self, previous: LightingState) -> None:
+        """Compute the light level of every position on the board,
+        given the state of an earlier run on a similar board. Only the
+        cells within reach of an emitter which changed (or whose light
+        passes through a changed space) are recomputed; everything else
+        keeps its previous light level. The result is the same as that
+        of compute_all_lights.
+
+        If the previous state has a different shape or lighting
+        configuration, this falls back to compute_all_lights."""
+        if (
+                previous.width != self._board.width or
+                previous.height != self._board.height or
+                list(previous.floors) != list(self._board.floors) or
+                previous.config_key != self._lighting_config.fingerprint()
+        ):
+            self.compute_all_lights()
+            return
+
+        palette = SpacePalette(previous.palette)
+        changed: list[tuple[int, int, FloorNumber]] = []
+        for z, floor in self._board.floors.items():
+            floor_state = previous.floors[z]
+            differs = (
+                (np.array(self._source_levels[z], dtype=np.int32) != floor_state.sources) |
+                (palette.encode(floor) != floor_state.names)
+            )
+            changed.extend((int(x), int(y), z) for y, x in zip(*np.nonzero(differs)))
+
+        # Every emitter before and after the change, assuming for now
+        # that adjacency rules emit the same power as they did before.
+        old_derived = previous.derived_powers
+        old_targets = _target_positions(previous, palette, self._lighting_config.adjacency)
+        old_emitters = _emitters(
+            (
+                (int(x), int(y), z)
+                for z, floor_state in previous.floors.items()
+                for y, x in zip(*np.nonzero(floor_state.sources))
+            ),
+            lambda position: int(previous.floors[position[2]].sources[position[1], position[0]]),
+            old_targets,
+            old_derived,
+        )
+        new_emitters = _emitters(
+            (position for position in self._board.indices if self._source_level(position) > 0),
+            self._source_level,
+            self._adjacency_targets,
+            old_derived,
+        )
+
+        dirty = _Region(self._board)
+        changed_set = set(changed)
+        for emitters in (old_emitters, new_emitters):
+            for position, power in emitters.items():
+                if position in changed_set or any(_within_reach(position, other, power - 1) for other in changed):
+                    dirty.add_reach(position, power - 1)
+
+        # If an adjacency rule ends up emitting a different power than
+        # it did before, then everything its targets can reach is
+        # affected as well, so repeat with a larger dirty region until
+        # the assumption above holds for every rule.
+        covered: dict[str, int] = {}
+        while True:
+            self._lighting_grid = LightingGrid.from_levels(
+                {z: floor_state.levels.tolist() for z, floor_state in previous.floors.items()},
+            )
+            self._lighting_grid.clear(dirty)
+            derived = self._propagate(dirty)
+            stale = []
+            for name in set(derived) | set(old_derived):
+                power = derived.get(name, 0)
+                if name in covered:
+                    if power > covered[name]:
+                        stale.append(name)
+                elif power != old_derived.get(name, 0):
+                    stale.append(name)
+            if not stale:
+                break
+            for name in stale:
+                power = max(derived.get(name, 0), old_derived.get(name, 0), covered.get(name, 0))
+                covered[name] = power
+                for position in [*old_targets.get(name, ()), *self._adjacency_targets.get(name, ())]:
+                    dirty.add_reach(position, power - 1)
+        self._derived_powers = derived
+
+    def state(self) -> LightingState:
+        """A snapshot of the inputs and results of the last lighting
+        computation, suitable for recompute_lights on a later run."""
+        palette = SpacePalette()
+        levels = self.light_levels()
+        floors = {
+            z: LightingFloorState(
+                sources=np.array(self._source_levels[z], dtype=np.int32),
+                names=palette.encode(floor),
+                levels=levels[z],
+            )
+            for z, floor in self._board.floors.items()
+        }
+        return LightingState(
+            width=self._board.width,
+            height=self._board.height,
+            config_key=self._lighting_config.fingerprint(),
+            palette=list(palette.names),
+            derived_powers=dict(self._derived_powers),
+            floors=floors,
+        )
+
+    def light_levels(self) -> dict[FloorNumber, npt.NDArray[np.int32]]:
+        """The computed light level of every position, as one array
+        per floor indexed [y, x]."""
+        return {
+            z: np.array(self._lighting_grid.floor_levels(z), dtype=np.int32)
+            for z in self._board.floors
+        }
+
+    def _source_level(self, position: tuple[int, int, FloorNumber]) -> int:
+        x, y, z = position
+        return self._source_levels[z][y][x]
+
+    def _propagate(self, region: _Region | None = None) -> dict[str, int]:
+        """Run the priority queue described in compute_all_lights,
+        returning the power emitted by the targets of each adjacency
+        rule. If a region is given, only positions in that region are
+        updated, and every other position is assumed to already hold
+        its final light level."""
+        adjacency_targets = self._adjacency_targets
+        adjacency_sources = self._adjacency_sources
+
+        queue: list[tuple[int, int, tuple[int, int, FloorNumber]]] = []
+        for position in self._board.indices:
+            light_level = self._source_level(position)
+            if light_level > 0:
+                heapq.heappush(queue, (- light_level, len(queue), position))
+
+        adjacency_power: dict[str, int] = {}
+        counter = len(queue)
+
+        def trigger(position: tuple[int, int, FloorNumber]) -> None:
+            nonlocal counter
+            target_name = adjacency_sources[position]
+            derived_power = self._lighting_grid[position] - 1
+            if derived_power > adjacency_power.get(target_name, 0):
+                adjacency_power[target_name] = derived_power
+                for target_position in adjacency_targets[target_name]:
+                    heapq.heappush(queue, (- derived_power, counter, target_position))
+                    counter += 1
+
+        if region is not None:
+            # Positions outside the region already have their final
+            # light level, so the rules they trigger apply immediately.
+            for position in adjacency_sources:
+                if position not in region:
+                    trigger(position)
+
+        emitted: dict[tuple[int, int, FloorNumber], int] = {}
+        while queue:
+            negative_power, _, position = heapq.heappop(queue)
+            power = - negative_power
+            if emitted.get(position, 0) >= power:
+                continue
+            emitted[position] = power
+            if region is not None and not region.is_reachable(position, power - 1):
+                continue
+            for lit_position in self._field.emit(self._lighting_grid, position, power, adjacency_sources, region):
+                trigger(lit_position)
+        return adjacency_power
 
     def darken_board(self) -> None:
-        for x, y, z in self._board.indices:
-            space = self._board.get_space(x, y, z)
-            if self._lighting_grid[x, y, z] <= 0:
-                space.space_name = self._lighting_config.darkness
-                space.token_ids = []
-                space.attribute_ids = []
+        """Replace every unlit space with darkness, removing its tokens
+        and attributes."""
+        darkness = self._lighting_config.darkness
+        for z, floor in self._board.floors.items():
+            unlit = [
+                [light_level <= 0 for light_level in light_row]
+                for light_row in self._lighting_grid.floor_levels(z)
+            ]
+            floor.reset_tiles(unlit, darkness)
+
+
+@dataclass(frozen=True)
+class _LightField:
+    """The parts of a board which determine how light travels across
+    it: its shape, and the diminishing factor of every space on each
+    finite floor (keyed by integer floor number). This is everything
+    needed to emit light, and it is cheap to send to another
+    process."""
+    width: int
+    height: int
+    floors: frozenset[FloorNumber]
+    dampening: dict[int, list[list[int]]]
+
+    def in_bounds(self, x: int, y: int, z: FloorNumber) -> bool:
+        return z in self.floors and 0 <= x < self.width and 0 <= y < self.height
+
+    def emit(
+            self,
+            lighting_grid: LightingGrid,
+            position: tuple[int, int, FloorNumber],
+            power: int,
+            watched: Container[tuple[int, int, FloorNumber]] = (),
+            region: Container[tuple[int, int, FloorNumber]] | None = None,
+    ) -> list[tuple[int, int, FloorNumber]]:
+        """Emit light of the given power from the position onto the
+        lighting grid, only affecting positions in region if one is
+        given. Returns the
+        positions in watched whose light level increased as a
+        result."""
+        x0, y0, z0 = position
+        increased = []
+        for dx, dy, dz, distance, ray in _emission_offsets(power - 1):
+            if dz != 0 and z0.is_infinite():
+                # Every floor offset from infinity is infinity again,
+                # and the offset with dz = 0 is always the brightest.
+                continue
+            x, y = x0 + dx, y0 + dy
+            z = z0 + dz
+            if not self.in_bounds(x, y, z):
+                continue
+            if region is not None and (x, y, z) not in region:
+                continue
+            light_level = power - distance
+            if light_level <= lighting_grid[x, y, z]:
+                # Dampening can only make it darker, so this can't
+                # possibly brighten the space.
+                continue
+            if not z.is_infinite() and not z0.is_infinite():
+                # At infinity, the concept of distance is
+                # meaningless, so don't try to compute it.
+                light_level -= self.dampening_along_ray(x0, y0, z0.as_integer(), ray)
+            if lighting_grid.update((x, y, z), light_level) and (x, y, z) in watched:
+                increased.append((x, y, z))
+        return increased
+
+    def dampening_along_ray(self, x0: int, y0: int, z0: int, ray: Sequence[tuple[int, int, int]]) -> int:
+        total = 0
+        for dx, dy, dz in ray:
+            floor = self.dampening.get(z0 + dz)
+            if floor is None:
+                # The board isn't convex anymore, since floors is a
+                # sparse array.
+                continue
+            total += floor[y0 + dy][x0 + dx]
+        return total
+
+
+# The light field of the board being lit, in a worker process of
+# LightingEngine._compute_in_parallel.
+_worker_field: _LightField | None = None
+
+
+def _init_worker(field: _LightField) -> None:
+    global _worker_field
+    _worker_field = field
+
+
+def _light_partition(
+        emitters: list[tuple[tuple[int, int, FloorNumber], int]],
+) -> dict[FloorNumber, npt.NDArray[np.int32]]:
+    """Light the given emitters on an initially dark grid, in a worker
+    process. Returns the resulting light levels of each floor that
+    any emitter reached."""
+    field = _worker_field
+    assert field is not None, "Worker process was not initialized"
+    lighting_grid = LightingGrid(field.width, field.height, field.floors)
+    for position, power in emitters:
+        field.emit(lighting_grid, position, power)
+    return {
+        z: np.array(lighting_grid.floor_levels(z), dtype=np.int32)
+        for z in field.floors
+        if any(map(any, lighting_grid.floor_levels(z)))
+    }
+
+
+def _partition_emitters(
+        emitters: Mapping[tuple[int, int, FloorNumber], int],
+        count: int,
+) -> list[list[tuple[tuple[int, int, FloorNumber], int]]]:
+    """Divide the emitters into at most count groups of roughly equal
+    work. An emitter of power P visits every space within distance
+    P - 1, which is on the order of P ** 3 spaces on a finite floor but
+    only P ** 2 on the infinity floor, which has no neighbors. Each
+    group is ordered by decreasing power, so that weaker emitters can
+    skip spaces which are already brighter."""
+    ordered = sorted(
+        emitters.items(),
+        key=lambda item: (- _emission_cost(*item), item[0][2], item[0][1], item[0][0]),
+    )
+    groups: list[list[tuple[tuple[int, int, FloorNumber], int]]] = [[] for _ in range(max(count, 1))]
+    loads = [0] * len(groups)
+    for position, power in ordered:
+        index = loads.index(min(loads))
+        groups[index].append((position, power))
+        loads[index] += _emission_cost(position, power)
+    for group in groups:
+        group.sort(key=lambda item: - item[1])
+    return [group for group in groups if group]
+
+
+def _emission_cost(position: tuple[int, int, FloorNumber], power: int) -> int:
+    if position[2].is_infinite():
+        return power ** 2
+    return power ** 3
+
+
+class _Region:
+    """A set of positions on a board, which also tracks the bounding
+    box of its positions on each floor so that emitters which cannot
+    possibly reach it can be skipped quickly."""
+    _board: Board
+    _positions: set[tuple[int, int, FloorNumber]]
+    # (min x, min y, max x, max y) on each floor.
+    _bounds: dict[FloorNumber, tuple[int, int, int, int]]
+
+    def __init__(self, board: Board) -> None:
+        self._board = board
+        self._positions = set()
+        self._bounds = {}
+
+    def __contains__(self, position: object) -> bool:
+        return position in self._positions
+
+    def __iter__(self) -> Iterator[tuple[int, int, FloorNumber]]:
+        return iter(self._positions)
+
+    def add_reach(self, position: tuple[int, int, FloorNumber], radius: int) -> None:
+        """Add every position which light emitted from the given
+        position could reach within the given distance."""
+        x0, y0, z0 = position
+        for dx, dy, dz, _, _ in _emission_offsets(radius):
+            if dz != 0 and z0.is_infinite():
+                continue
+            x, y, z = x0 + dx, y0 + dy, z0 + dz
+            if self._board.in_bounds(x, y, z):
+                self._positions.add((x, y, z))
+                if z in self._bounds:
+                    min_x, min_y, max_x, max_y = self._bounds[z]
+                    self._bounds[z] = (min(min_x, x), min(min_y, y), max(max_x, x), max(max_y, y))
+                else:
+                    self._bounds[z] = (x, y, x, y)
+
+    def is_reachable(self, position: tuple[int, int, FloorNumber], radius: int) -> bool:
+        """Whether light emitted from the given position within the
+        given distance might reach this region. This is conservative:
+        it may return true even when no position is reachable."""
+        x0, y0, z0 = position
+        for z, (min_x, min_y, max_x, max_y) in self._bounds.items():
+            if z.is_infinite() or z0.is_infinite():
+                if z != z0:
+                    continue
+                remaining = radius
+            else:
+                remaining = radius - abs(z.as_integer() - z0.as_integer())
+            if remaining < 0:
+                continue
+            if min_x - remaining <= x0 <= max_x + remaining and min_y - remaining <= y0 <= max_y + remaining:
+                return True
+        return False
+
+
+def _within_reach(source: tuple[int, int, FloorNumber], target: tuple[int, int, FloorNumber], radius: int) -> bool:
+    x0, y0, z0 = source
+    x1, y1, z1 = target
+    if z0.is_infinite() or z1.is_infinite():
+        if z0 != z1:
+            return False
+        dz = 0
+    else:
+        dz = abs(z1.as_integer() - z0.as_integer())
+    return abs(x1 - x0) + abs(y1 - y0) + dz <= radius
+
+
+def _emitters(
+        sources: Iterable[tuple[int, int, FloorNumber]],
+        source_level: Callable[[tuple[int, int, FloorNumber]], int],
+        targets: Mapping[str, Sequence[tuple[int, int, FloorNumber]]],
+        derived_powers: Mapping[str, int],
+) -> dict[tuple[int, int, FloorNumber], int]:
+    """The power of every emitter on a board, given its light sources
+    and the power emitted by the targets of each adjacency rule."""
+    emitters = {position: source_level(position) for position in sources}
+    for name, power in derived_powers.items():
+        for position in targets.get(name, ()):
+            emitters[position] = max(emitters.get(position, 0), power)
+    return emitters
+
+
+def _target_positions(
+        state: LightingState,
+        palette: SpacePalette,
+        adjacency: Mapping[str, str],
+) -> dict[str, list[tuple[int, int, FloorNumber]]]:
+    """The positions of the targets of each adjacency rule in the
+    board from which the state was computed."""
+    targets: dict[str, list[tuple[int, int, FloorNumber]]] = {}
+    for name in set(adjacency.values()):
+        code = palette.code(name)
+        targets[name] = [
+            (int(x), int(y), z)
+            for z, floor_state in state.floors.items()
+            for y, x in zip(*np.nonzero(floor_state.names == code))
+        ]
+    return targets
+
+
+def _dampening_grid(lighting_config: LightingConfig, board: Board) -> dict[int, list[list[int]]]:
+    diminishing = lighting_config.diminishing
+    return {
+        z.as_integer(): [
+            [diminishing.get(normalize_space_name(tile.space_name), 0) for tile in row]
+            for row in floor.rows
+        ]
+        for z, floor in board.floors.items()
+        if not z.is_infinite()
+    }
+
+
+@cache
+def _emission_offsets(radius: int) -> list[tuple[int, int, int, int, Sequence[tuple[int, int, int]]]]:
+    """The offsets (dx, dy, dz) within the given Manhattan distance of
+    the origin, each with its distance from the origin and the ray of
+    offsets between the two (see _ray_offsets). Shared by every light
+    source of the same power."""
+    return [
+        (dx, dy, dz, abs(dx) + abs(dy) + abs(dz), _ray_offsets(dx, dy, dz))
+        for dx, dy, dz in manhattan_circle((0, 0, 0), radius)
+    ]
 
 
 class LightingGrid:
@@ -115,37 +673,85 @@ class LightingGrid:
         for floor in floors:
             self._grid[floor] = [[0] * width for _ in range(height)]
 
+    @classmethod
+    def from_levels(cls, levels: dict[FloorNumber, list[list[int]]]) -> LightingGrid:
+        """Constructs a lighting grid with the given light levels on
+        each floor. The grid takes ownership of the lists."""
+        lighting_grid = cls(0, 0, ())
+        lighting_grid._grid = levels
+        return lighting_grid
+
     def __getitem__(self, index: tuple[int, int, FloorNumber]) -> int:
         """Get the light at the given position. Raises KeyError if out
         of bounds."""
         x, y, z = index
         return self._grid[z][y][x]
 
-    def update(self, index: tuple[int, int, FloorNumber], new_light: int) -> None:
+    def floor_levels(self, floor: FloorNumber) -> Sequence[Sequence[int]]:
+        """The light levels of the given floor, in row-major order.
+        Raises KeyError if the floor does not exist."""
+        return self._grid[floor]
+
+    def update(self, index: tuple[int, int, FloorNumber], new_light: int) -> bool:
         """Set the light level at the given position to the maximum of
         its current value and the proposed new value. If this actually
         ends up changing the value, then this method sets is_dirty to
-        true."""
+        true. Returns whether the value changed."""
         x, y, z = index
         old_light = self._grid[z][y][x]
-        new_light = max(self._grid[z][y][x], new_light)
+        if new_light <= old_light:
+            return False
         self._grid[z][y][x] = new_light
-        if old_light != new_light:
-            self.is_dirty = True
+        self.is_dirty = True
+        return True
+
+    def clear(self, indices: Iterable[tuple[int, int, FloorNumber]]) -> None:
+        """Set the light level at each of the given positions to zero.
+        This does not affect the dirty bit."""
+        for x, y, z in indices:
+            self._grid[z][y][x] = 0
 
     def reset_dirty_bit(self) -> None:
         """Set is_dirty to false."""
         self.is_dirty = False
 
 
-def _get_intersected_spaces(origin: tuple[int, int, int],
-                            destination: tuple[int, int, int]) -> Iterable[tuple[int, int, int]]:
-    xorigin, yorigin, zorigin = (origin[0] + 0.5, origin[1] + 0.5, origin[2] + 0.5)
-    xdest, ydest, zdest = (destination[0] + 0.5, destination[1] + 0.5, destination[2] + 0.5)
-    result = set()
-    for i in range(50):
-        x = lerp(xorigin, xdest, i / 50)
-        y = lerp(yorigin, ydest, i / 50)
-        z = lerp(zorigin, zdest, i / 50)
-        result.add((int(math.floor(x)), int(math.floor(y)), int(math.floor(z))))
-    return result
+@cache
+def _ray_offsets(dx: int, dy: int, dz: int) -> tuple[tuple[int, int, int], ...]:
+    """The offsets of the spaces through which light passes on its way
+    from the center of the space at the origin to the center of the
+    space at (dx, dy, dz), in order, including both endpoints.
+
+    This is an exact 3D DDA traversal, computed in integer arithmetic.
+    When the line passes exactly through an edge or corner between
+    spaces, it steps along all of the tied axes at once, so spaces
+    which the line only grazes at a single edge or point are not
+    included."""
+    lengths = (abs(dx), abs(dy), abs(dz))
+    steps = (1 if dx > 0 else -1, 1 if dy > 0 else -1, 1 if dz > 0 else -1)
+    crossed = [0, 0, 0]
+    position = [0, 0, 0]
+    result = [(0, 0, 0)]
+    while crossed[0] < lengths[0] or crossed[1] < lengths[1] or crossed[2] < lengths[2]:
+        # The line crosses its next boundary along axis i at
+        # t = (2 * crossed[i] + 1) / (2 * lengths[i]). Step along
+        # whichever axes cross soonest.
+        nearest: list[int] = []
+        for axis in range(3):
+            if crossed[axis] == lengths[axis]:
+                continue
+            if not nearest:
+                nearest = [axis]
+                continue
+            best = nearest[0]
+            lhs = (2 * crossed[axis] + 1) * lengths[best]
+            rhs = (2 * crossed[best] + 1) * lengths[axis]
+            if lhs < rhs:
+                nearest = [axis]
+            elif lhs == rhs:
+                nearest.append(axis)
+        for axis in nearest:
+            position[axis] += steps[axis]
+            crossed[axis] += 1
+        result.append((position[0], position[1], position[2]))
+    return tuple(result)
@@ -7,6 +7,7 @@ from wuas.floornumber import FloorNumber
 
 from dataclasses import dataclass
 from typing import Any
+import json
 
 
 @dataclass
@@ -19,6 +20,15 @@ class LightingConfig:
     tokens: dict[str, int]
     adjacency: dict[str, str]
     diminishing: dict[str, int]
+    # Optional file in which to persist the lighting state between
+    # runs, so that unchanged parts of the board need not be relit.
+    state_file: str | None = None
+    # Number of processes among which to divide the light sources
+    # when lighting the whole board.
+    workers: int = 1
+    # Optional directory in which to cache the computed light levels
+    # of each board, keyed by board hash.
+    grid_cache: str | None = None
 
     @classmethod
     def from_json(cls, json_data: Any) -> LightingConfig:
@@ -29,8 +39,23 @@ class LightingConfig:
             tokens=_validate_dict(json_data['tokens']),
             adjacency=json_data['adjacency'],
             diminishing=json_data['diminishing'],
+            state_file=json_data.get('state_file'),
+            workers=json_data.get('workers', 1),
+            grid_cache=json_data.get('grid_cache'),
         )
 
+    def fingerprint(self) -> str:
+        """A string which identifies the settings that affect the
+        computed light levels. Two configurations with the same
+        fingerprint light every board identically."""
+        return json.dumps([
+            self.spaces,
+            self.items,
+            self.tokens,
+            self.adjacency,
+            self.diminishing,
+        ], sort_keys=True)
+
 
 def _validate_dict(input_dict: Any) -> dict[Any, Any]:
     assert isinstance(input_dict, dict)
@@ -0,0 +1,165 @@
+
+"""Persistent snapshots of the lighting engine, so that the next run
+on a mostly-unchanged board can recompute only the affected cells.
+
+A snapshot records, for every cell of every floor, the inputs to the
+lighting computation (the light emitted by the cell itself and its
+space name, from which dampening and adjacency rules follow) and the
+computed light level. Snapshots are stored as a compressed NumPy
+archive.
+
+Separately, LightingGridCache stores just the computed light levels
+of a board, keyed by the board's content hash, so that other tools can
+show or query them without rerunning the engine."""
+
+from __future__ import annotations
+
+from wuas.floornumber import FloorNumber
+
+from dataclasses import dataclass
+from typing import Any, Mapping
+from pathlib import Path
+import json
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+STATE_FORMAT_VERSION = 1
+
+DEFAULT_MAX_GRID_CACHE_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class LightingFloorState:
+    # All arrays are indexed [y, x].
+    sources: npt.NDArray[np.int32]
+    names: npt.NDArray[np.int32]
+    levels: npt.NDArray[np.int32]
+
+
+@dataclass(frozen=True)
+class LightingState:
+    """The inputs and outputs of a single run of the lighting engine.
+
+    config_key identifies the lighting configuration which produced
+    this state; a state is only reusable under the same configuration.
+    Space names are stored as indices into the palette list.
+    derived_powers is the power of the light emitted by the targets
+    of each adjacency rule."""
+    width: int
+    height: int
+    config_key: str
+    palette: list[str]
+    derived_powers: dict[str, int]
+    floors: dict[FloorNumber, LightingFloorState]
+
+    def save(self, filename: str) -> None:
+        """Write this state to the given file."""
+        meta = {
+            'version': STATE_FORMAT_VERSION,
+            'width': self.width,
+            'height': self.height,
+            'config_key': self.config_key,
+            'palette': self.palette,
+            'derived_powers': self.derived_powers,
+            'floors': [z.name for z in self.floors],
+        }
+        arrays: dict[str, Any] = {'meta': np.array(json.dumps(meta))}
+        for z, floor_state in self.floors.items():
+            arrays[f"sources:{z.name}"] = floor_state.sources
+            arrays[f"names:{z.name}"] = floor_state.names
+            arrays[f"levels:{z.name}"] = floor_state.levels
+        # Pass a file object, since np.savez_compressed otherwise
+        # appends its own extension to the filename.
+        with open(filename, 'wb') as output_file:
+            np.savez_compressed(output_file, **arrays)
+
+    @classmethod
+    def load(cls, filename: str) -> LightingState:
+        """Read a state written by save. Raises ValueError if the file
+        is not a lighting state of the current format version."""
+        try:
+            with np.load(filename, allow_pickle=False) as archive:
+                meta = json.loads(str(archive['meta']))
+                if meta.get('version') != STATE_FORMAT_VERSION:
+                    raise ValueError(f"Unsupported lighting state version {meta.get('version')!r}")
+                floors = {}
+                for name in meta['floors']:
+                    floors[FloorNumber(name)] = LightingFloorState(
+                        sources=archive[f"sources:{name}"],
+                        names=archive[f"names:{name}"],
+                        levels=archive[f"levels:{name}"],
+                    )
+        except (KeyError, OSError, json.JSONDecodeError) as exc:
+            raise ValueError(f"Invalid lighting state file {filename!r}") from exc
+        return cls(
+            width=meta['width'],
+            height=meta['height'],
+            config_key=meta['config_key'],
+            palette=meta['palette'],
+            derived_powers=meta['derived_powers'],
+            floors=floors,
+        )
+
+
+class LightingGridCache:
+    """A directory of computed lighting grids, one file per board,
+    named by the board's content hash (see wuas.hashing). Each file is
+    a compressed NumPy archive with one array of light levels per
+    floor, indexed [y, x]. When the directory grows beyond max_bytes,
+    the least recently used grids are evicted."""
+    _directory: Path
+    _max_bytes: int
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int = DEFAULT_MAX_GRID_CACHE_BYTES) -> None:
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+
+    def path(self, board_hash: str) -> Path:
+        return self._directory / f"{board_hash}.npz"
+
+    def store(self, board_hash: str, levels: Mapping[FloorNumber, npt.NDArray[np.int32]]) -> None:
+        """Save the light levels for the board with the given hash,
+        creating the cache directory if necessary, and evict old grids
+        if the cache is now too large."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        arrays: dict[str, Any] = {
+            'floors': np.array(json.dumps([z.name for z in levels])),
+        }
+        for z, floor_levels in levels.items():
+            arrays[f"levels:{z.name}"] = floor_levels
+        with open(self.path(board_hash), 'wb') as output_file:
+            np.savez_compressed(output_file, **arrays)
+        self.evict()
+
+    def load(self, board_hash: str) -> dict[FloorNumber, npt.NDArray[np.int32]] | None:
+        """The light levels for the board with the given hash, or None
+        if they have not been cached."""
+        path = self.path(board_hash)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                floor_names = json.loads(str(archive['floors']))
+                levels = {FloorNumber(name): archive[f"levels:{name}"] for name in floor_names}
+        except FileNotFoundError:
+            return None
+        # Mark the grid as recently used.
+        os.utime(path)
+        return levels
+
+    def evict(self) -> None:
+        """Delete the least recently used grids until the cache fits
+        within its size bound."""
+        entries = []
+        for path in self._directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
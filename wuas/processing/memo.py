@@ -0,0 +1,142 @@
+
+"""Memoization of board processors. The board produced by a processor
+is stored in a cache directory, keyed by everything which determines
+it: the content hash of the input board (see wuas.hashing), the
+processor's name and parameters, and the configuration. Running the
+same processor on the same board again loads the stored result rather
+than recomputing it.
+
+Only processors which report a cache_key are memoized; a processor
+whose result depends on unseeded randomness (see wuas.rng) or on state
+outside of the board reports None and is always run."""
+
+from __future__ import annotations
+
+from wuas.processing.abc import BoardProcessor
+from wuas.processing.access import BoardAccess
+from wuas.board import Board
+from wuas.config import ConfigFile
+from wuas.hashing import board_hash
+
+from pathlib import Path
+import gzip
+import hashlib
+import json
+import os
+import pickle
+
+MEMO_FORMAT_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ProcessorCache:
+    """A directory of processor results, one compressed pickle per
+    result. When the directory grows beyond max_bytes, the least
+    recently used results are evicted. The cache directory is trusted,
+    since its files are unpickled."""
+    _directory: Path
+    _max_bytes: int
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+
+    def path(self, key: str) -> Path:
+        return self._directory / f"{key}.pickle.gz"
+
+    def load(self, key: str) -> Board | None:
+        """The board stored under the given key, or None if there is
+        none (or it cannot be read)."""
+        path = self.path(key)
+        try:
+            with gzip.open(path, 'rb') as input_file:
+                board = pickle.load(input_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # A partially-written or corrupt entry is no worse than a
+            # missing one.
+            return None
+        if not isinstance(board, Board):
+            return None
+        # Mark the entry as recently used.
+        os.utime(path)
+        return board
+
+    def store(self, key: str, board: Board) -> None:
+        """Save the board under the given key, creating the cache
+        directory if necessary, and evict old entries if the cache is
+        now too large."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        # Write to a temporary file first, so that a concurrent reader
+        # never sees a partial entry.
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with gzip.open(temp_path, 'wb') as output_file:
+            pickle.dump(board, output_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits
+        within its size bound."""
+        entries = []
+        for path in self._directory.glob("*.pickle.gz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+
+class MemoizedProcessor(BoardProcessor):
+    """A processor which consults a ProcessorCache before running the
+    processor it wraps, and stores the result afterward."""
+    processor: BoardProcessor
+    cache: ProcessorCache
+
+    def __init__(self, processor: BoardProcessor, cache: ProcessorCache) -> None:
+        self.processor = processor
+        self.cache = cache
+
+    def access(self) -> BoardAccess | None:
+        return self.processor.access()
+
+    def cache_key(self) -> str | None:
+        return self.processor.cache_key()
+
+    def run(self, config: ConfigFile, board: Board) -> None:
+        key = memo_key(config, board, self.processor)
+        if key is None:
+            self.processor.run(config, board)
+            return
+        result = self.cache.load(key)
+        if result is not None:
+            board.replace_contents(result)
+            return
+        self.processor.run(config, board)
+        self.cache.store(key, board)
+
+
+def memo_key(config: ConfigFile, board: Board, processor: BoardProcessor) -> str | None:
+    """The key under which the result of running the processor on the
+    board is cached, or None if the processor cannot be memoized."""
+    processor_key = processor.cache_key()
+    if processor_key is None:
+        return None
+    processor_class = type(processor)
+    key_data = json.dumps([
+        MEMO_FORMAT_VERSION,
+        board_hash(board),
+        f"{processor_class.__module__}.{processor_class.__name__}",
+        processor_key,
+        config.fingerprint(),
+    ])
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
@@ -6,41 +6,119 @@ locations."""
 from __future__ import annotations
 
 from wuas.processing.abc import BoardProcessor
-from wuas.board import Board, Floor, ConcreteToken
-from wuas.config import ConfigFile
+from wuas.processing.access import BoardAccess, BoardLayer, FloorLayer
+from wuas.board import Board, TileData, ConcreteToken
+from wuas.floornumber import FloorNumber
+from wuas.config import ConfigFile, normalize_space_name
 from wuas.processing.registry import registered_processor
 
+from typing import Container, Sequence
+from dataclasses import dataclass, field
+
 
 _DEFAULT_SPAN = (1, 1)
 
 
 @registered_processor(aliases=["mirror"])
 class MirrorProcessor(BoardProcessor):
+    """Mirrors every floor of the board horizontally. Tokens which span
+    more than one column are shifted so that they still cover the same
+    spaces. Each row is reversed in place and its tokens are adjusted
+    in the same sweep, so the whole board is visited once."""
+
+    def access(self) -> BoardAccess:
+        every_layer = [FloorLayer(layer) for layer in BoardLayer]
+        return BoardAccess.of(reads=every_layer, writes=every_layer)
+
+    def cache_key(self) -> str | None:
+        return ''
 
     def run(self, config: ConfigFile, board: Board) -> None:
-        for floor in board.floors.values():
-            self._mirror_floor(floor)
-            self._adjust_tokens(config, board, floor)
+        self.mirror_board(config, board)
+
+    def mirror_board(
+            self,
+            config: ConfigFile,
+            board: Board,
+            watched_tokens: Container[str] = frozenset(),
+            watched_spaces: Container[str] = frozenset(),
+    ) -> MirrorIndex:
+        """Mirror the board, and return the positions (after mirroring)
+        of the given token abbreviations and space names, as found
+        along the way."""
+        column_shifts = _ColumnShifts(config, board)
+        index = MirrorIndex()
+        for z, floor in sorted(board.floors.items(), key=lambda item: item[0]):
+            floor.reverse_rows()
+            for y, row in enumerate(floor.rows):
+                _adjust_tokens(row, column_shifts)
+                if watched_tokens or watched_spaces:
+                    index.record_row(row, y, z, watched_tokens, watched_spaces)
         board.recompute_labels_map()
+        return index
+
+
+@dataclass
+class MirrorIndex:
+    """Positions of interest on a mirrored board. tokens holds each
+    occurrence of a watched token abbreviation, in the order of
+    Board.indices. spaces holds the first position of each watched
+    space name, in the same order."""
+    tokens: list[tuple[str, tuple[int, int, FloorNumber]]] = field(default_factory=list)
+    spaces: dict[str, tuple[int, int, FloorNumber]] = field(default_factory=dict)
+
+    def record_row(
+            self,
+            row: Sequence[TileData],
+            y: int,
+            z: FloorNumber,
+            watched_tokens: Container[str],
+            watched_spaces: Container[str],
+    ) -> None:
+        for x, tile in enumerate(row):
+            for ref in tile.token_ids:
+                if ref in watched_tokens:
+                    self.tokens.append((ref, (x, y, z)))
+            space_name = normalize_space_name(tile.space_name)
+            if space_name in watched_spaces and space_name not in self.spaces:
+                self.spaces[space_name] = (x, y, z)
+
+
+def _adjust_tokens(row: Sequence[TileData], column_shifts: _ColumnShifts) -> None:
+    # A token wider than one space is anchored at its leftmost space,
+    # which is now its rightmost, so move it back to the left. The
+    # destination is always earlier in the row, so each token is moved
+    # at most once.
+    for x, tile in enumerate(row):
+        if not any(column_shifts[ref] for ref in tile.token_ids):
+            continue
+        remaining = []
+        for ref in tile.token_ids:
+            shift = column_shifts[ref]
+            if shift > 0:
+                if x < shift:
+                    raise IndexError(f"Token {ref} would be mirrored off the board")
+                row[x - shift].token_ids.append(ref)
+            else:
+                remaining.append(ref)
+        tile.token_ids = remaining
+
+
+class _ColumnShifts(dict[str, int]):
+    """The number of columns by which each token must be shifted after
+    mirroring (one less than the width of its span), computed at most
+    once per token abbreviation."""
+    _config: ConfigFile
+    _board: Board
+
+    def __init__(self, config: ConfigFile, board: Board) -> None:
+        super().__init__()
+        self._config = config
+        self._board = board
 
-    def _mirror_floor(self, floor: Floor) -> None:
-        width = floor.width
-        for x0, y in floor.indices:
-            x1 = width - 1 - x0
-            if x0 < x1:
-                floor.tiles[x0, y], floor.tiles[x1, y] = floor.tiles[x1, y], floor.tiles[x0, y]
-
-    def _adjust_tokens(self, config: ConfigFile, board: Board, floor: Floor) -> None:
-        for x, y in floor.indices:
-            tile = floor.get_space(x, y)
-            token_refs = list(tile.token_ids)  # Make a duplicate that we can modify.
-            for token_ref in tile.token_ids:
-                token_span = _get_token_span(config, board, token_ref)
-                if token_span[0] > 1:
-                    new_x = x - (token_span[0] - 1)
-                    floor.get_space(new_x, y).append_token_id(token_ref)
-                    token_refs.remove(token_ref)
-            tile.token_ids = token_refs
+    def __missing__(self, token_ref: str) -> int:
+        shift = self[token_ref] = _get_token_span(self._config, self._board, token_ref)[0] - 1
+        return shift
 
 
 def _get_token_span(config: ConfigFile, board: Board, token_ref: str) -> tuple[int, int]:
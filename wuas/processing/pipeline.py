@@ -0,0 +1,47 @@
+
+"""Runs a sequence of board processors, fusing consecutive tile
+visitors into a single traversal of the board."""
+
+from __future__ import annotations
+
+from wuas.processing.abc import BoardProcessor, TileVisitorProcessor
+from wuas.board import Board
+from wuas.config import ConfigFile
+
+from typing import Iterable
+
+
+def run_processors(config: ConfigFile, board: Board, processors: Iterable[BoardProcessor]) -> None:
+    """Run each processor on the board, in order. The result is the
+    same as calling run on each processor in turn, but consecutive
+    TileVisitorProcessors are divided into phases, each of which
+    visits every tile of the board exactly once. A phase ends at every
+    processor which is not a tile visitor (which is run on the whole
+    board as usual) and before every visitor whose prepare step needs
+    to see the board as left by the processors before it."""
+    phase: list[TileVisitorProcessor] = []
+    for processor in processors:
+        if not isinstance(processor, TileVisitorProcessor):
+            _run_phase(config, board, phase)
+            phase = []
+            processor.run(config, board)
+            continue
+        if processor.PREPARE_READS_BOARD:
+            _run_phase(config, board, phase)
+            phase = []
+        processor.prepare(config, board)
+        phase.append(processor)
+    _run_phase(config, board, phase)
+
+
+def _run_phase(config: ConfigFile, board: Board, visitors: list[TileVisitorProcessor]) -> None:
+    # Every visitor in the phase has already been prepared.
+    if not visitors:
+        return
+    for z, floor in board.floors.items():
+        for y, row in enumerate(floor.rows):
+            for x, tile in enumerate(row):
+                for visitor in visitors:
+                    visitor.visit(x, y, z, tile)
+    for visitor in visitors:
+        visitor.finish(config, board)
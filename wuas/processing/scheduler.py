@@ -0,0 +1,69 @@
+
+"""Runs board processors concurrently, where their declared accesses
+allow it.
+
+Each processor is a node in a dependency graph, with an edge from
+every earlier processor whose access conflicts with its own (or from
+every earlier processor at all, if either access is unknown). Ready
+processors are run in a process pool on a copy of the board, and the
+resources each one writes are copied back into the real board when it
+finishes. Processors which run at the same time never touch the same
+resources, so the result is the same as running every processor in
+command-line order, no matter which one finishes first."""
+
+from __future__ import annotations
+
+from wuas.processing.abc import BoardProcessor
+from wuas.processing.access import BoardAccess, BoardChanges
+from wuas.board import Board
+from wuas.config import ConfigFile
+
+from typing import Sequence
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+
+
+def run_concurrently(config: ConfigFile, board: Board, processors: Sequence[BoardProcessor], workers: int) -> None:
+    """Run each processor on the board, using up to the given number of
+    worker processes. Processors with unknown access are run in this
+    process, once everything before them has finished."""
+    accesses = [processor.access() for processor in processors]
+    dependencies = [
+        {i for i in range(j) if _must_precede(accesses[i], accesses[j])}
+        for j in range(len(processors))
+    ]
+    finished: set[int] = set()
+    pending = list(range(len(processors)))
+    running: dict[Future[BoardChanges], int] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for j in [j for j in pending if dependencies[j] <= finished]:
+                pending.remove(j)
+                access = accesses[j]
+                if access is None:
+                    # Everything before this processor has finished, and
+                    # everything after it is waiting on it.
+                    processors[j].run(config, board)
+                    finished.add(j)
+                    break
+                future = executor.submit(_run_isolated, processors[j], config, board, access)
+                running[future] = j
+            else:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result().apply(board)
+                    finished.add(running.pop(future))
+
+
+def _must_precede(earlier: BoardAccess | None, later: BoardAccess | None) -> bool:
+    return earlier is None or later is None or earlier.conflicts_with(later)
+
+
+def _run_isolated(
+        processor: BoardProcessor,
+        config: ConfigFile,
+        board: Board,
+        access: BoardAccess,
+) -> BoardChanges:
+    # Runs in a worker process, on its own copy of the board.
+    processor.run(config, board)
+    return BoardChanges.capture(board, access.writes)
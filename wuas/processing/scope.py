@@ -0,0 +1,116 @@
+
+"""Processors confined to part of the board.
+
+An instruction can be given a scope with the syntax NAME@SCOPE, where
+SCOPE is a comma-separated list of floors (or * for every floor),
+optionally followed by a colon and a region LEFT,TOP,WIDTH,HEIGHT.
+For example, terrain2023@0 advances the terrain on floor 0 only, and
+fire2023@*:0,0,10,10 spreads fire within the top-left 10x10 square of
+every floor.
+
+The scoped processor runs on a board materialized from a view of just
+that part of the board (see wuas.view), so it does proportionally less
+work, and the result is written back through the view. To the
+processor, the edges of the region are the edges of the board."""
+
+from __future__ import annotations
+
+from wuas.processing.abc import BoardProcessor
+from wuas.processing.access import BoardAccess, FloorLayer, Resource
+from wuas.board import Board
+from wuas.config import ConfigFile
+from wuas.floornumber import FloorNumber
+from wuas.view import BoardView, board_view
+
+from typing import Iterable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Scope:
+    """A set of floors, or every floor if floors is None, and
+    optionally a (left, top, width, height) rectangle of each."""
+    floors: tuple[FloorNumber, ...] | None = None
+    region: tuple[int, int, int, int] | None = None
+
+    @classmethod
+    def parse(cls, text: str) -> Scope:
+        """Parse a scope in the instruction syntax. Raises ValueError on
+        invalid input."""
+        floors_text, _, region_text = text.partition(':')
+        floors = None
+        if floors_text.strip() != '*':
+            floors = tuple(FloorNumber(floor_name) for floor_name in floors_text.split(','))
+        region = None
+        if region_text:
+            try:
+                left, top, width, height = (int(value) for value in region_text.split(','))
+            except ValueError:
+                raise ValueError(f"Invalid region {region_text!r}, expected LEFT,TOP,WIDTH,HEIGHT") from None
+            region = (left, top, width, height)
+        return cls(floors, region)
+
+    def view(self, board: Board) -> BoardView:
+        """A view of the part of the board within this scope. Raises
+        ValueError if the scope does not fit the board."""
+        view = board_view(board)
+        if self.floors is not None:
+            view = view.restricted(self.floors)
+        if self.region is not None:
+            view = view.cropped(*self.region)
+        return view
+
+    def __str__(self) -> str:
+        result = '*' if self.floors is None else ','.join(z.name for z in self.floors)
+        if self.region is not None:
+            result += ':' + ','.join(str(value) for value in self.region)
+        return result
+
+
+class ScopedProcessor(BoardProcessor):
+    """A processor which runs another processor on only the part of
+    the board within a scope."""
+    processor: BoardProcessor
+    scope: Scope
+
+    def __init__(self, processor: BoardProcessor, scope: Scope) -> None:
+        self.processor = processor
+        self.scope = scope
+
+    def access(self) -> BoardAccess | None:
+        access = self.processor.access()
+        if access is None or self.scope.floors is None:
+            return access
+        return BoardAccess.of(
+            reads=_restrict_resources(access.reads, self.scope.floors),
+            writes=_restrict_resources(access.writes, self.scope.floors),
+        )
+
+    def cache_key(self) -> str | None:
+        processor_key = self.processor.cache_key()
+        if processor_key is None:
+            return None
+        processor_class = type(self.processor)
+        return f"{processor_class.__module__}.{processor_class.__name__}@{self.scope}:{processor_key}"
+
+    def run(self, config: ConfigFile, board: Board) -> None:
+        view = self.scope.view(board)
+        scoped_board = view.materialize()
+        self.processor.run(config, scoped_board)
+        if (scoped_board.width, scoped_board.height) != (view.width, view.height):
+            raise ValueError(f"Processor {type(self.processor).__name__} cannot change the size of a scoped board")
+        view.write_back(scoped_board)
+
+
+def _restrict_resources(resources: Iterable[Resource], floors: tuple[FloorNumber, ...]) -> list[Resource]:
+    # A resource of every floor is narrowed to the floors in scope, and
+    # a resource of a floor out of scope is never touched.
+    result: list[Resource] = []
+    for resource in resources:
+        if not isinstance(resource, FloorLayer):
+            result.append(resource)
+        elif resource.floor is None:
+            result.extend(FloorLayer(resource.layer, z) for z in floors)
+        elif resource.floor in floors:
+            result.append(resource)
+    return result
@@ -0,0 +1,80 @@
+
+"""Seeded, independent streams of random numbers.
+
+A RandomStreams object is a node in a tree of random number streams,
+all derived from a single root seed. Each child or generator is
+identified by a key (such as an instruction index, a processor name,
+or a floor number), and the numbers it produces depend only on the
+root seed and the keys along its path, never on what any other stream
+has drawn. So a processor which draws from its own streams produces
+the same board whether it runs alone, after other processors, in
+another process, or concurrently with other processors."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+
+import numpy as np
+
+type StreamKey = str | int
+
+
+class RandomStreams:
+    """A node in a tree of random number streams. A node constructed
+    without a seed takes fresh entropy from the operating system, so
+    its streams are independent of one another but are not
+    reproducible."""
+    _seed: int | None
+    _entropy: int
+    _path: tuple[int, ...]
+
+    def __init__(self, seed: int | None = None) -> None:
+        self._seed = seed
+        self._entropy = seed if seed is not None else _fresh_entropy()
+        self._path = ()
+
+    @property
+    def seed(self) -> int | None:
+        """The root seed of the tree, or None if it was not seeded."""
+        return self._seed
+
+    def child(self, *key: StreamKey) -> RandomStreams:
+        """The node of the tree under the given key."""
+        result = RandomStreams.__new__(RandomStreams)
+        result._seed = self._seed
+        result._entropy = self._entropy
+        result._path = self._path + tuple(_key_int(component) for component in key)
+        return result
+
+    def generator(self, *key: StreamKey) -> np.random.Generator:
+        """A new generator for the stream under the given key. Every
+        call with the same key produces the same sequence of numbers."""
+        seed_sequence = np.random.SeedSequence(
+            self._entropy,
+            spawn_key=self._path + tuple(_key_int(component) for component in key),
+        )
+        return np.random.default_rng(seed_sequence)
+
+    def fingerprint(self) -> str | None:
+        """A string which identifies every stream of this node, or None
+        if the tree was not seeded."""
+        if self._seed is None:
+            return None
+        return json.dumps([self._seed, self._path])
+
+
+def _fresh_entropy() -> int:
+    entropy = np.random.SeedSequence().entropy
+    assert isinstance(entropy, int)
+    return entropy
+
+
+def _key_int(component: StreamKey) -> int:
+    # SeedSequence only accepts nonnegative integers in a spawn key, so
+    # everything else is hashed. The type is included, so that 1 and
+    # "1" name different streams.
+    if isinstance(component, int) and component >= 0:
+        return component
+    digest = hashlib.sha256(f"{type(component).__name__}:{component}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
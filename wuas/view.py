@@ -0,0 +1,330 @@
+
+"""Lazy, transformed views of a board.
+
+A BoardView presents the spaces of a board under some coordinate
+transformation (mirroring, translation, padding, cropping, or
+restriction to some floors) without copying anything. Each access is
+remapped to the underlying board, so a view of a board always reflects
+the board's current state. Views can be stacked, and any view can be
+materialized into a new, independent Board when a real copy is
+required. The tiles of such a copy can later be written back through
+the view.
+
+Spaces obtained from a view are live references to the underlying
+board, except for the spaces added by padding, which are not backed
+by anything and are created anew on each access."""
+
+from __future__ import annotations
+
+from wuas.board import Board, Space, TileData
+from wuas.floornumber import FloorNumber
+
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, Sequence, Mapping
+
+
+class BoardView(ABC):
+    """A read-only view of the spaces of a board. All views of a board
+    share its floors, tokens, attributes, metadata, and graph edges;
+    only the positions of the spaces differ."""
+
+    @property
+    @abstractmethod
+    def board(self) -> Board:
+        """The underlying board."""
+        ...
+
+    @property
+    @abstractmethod
+    def width(self) -> int:
+        ...
+
+    @property
+    @abstractmethod
+    def height(self) -> int:
+        ...
+
+    @abstractmethod
+    def _tile(self, x: int, y: int, z: FloorNumber) -> TileData:
+        """The tile at the given in-bounds position of the view."""
+        ...
+
+    @property
+    def floors(self) -> Sequence[FloorNumber]:
+        """The floor numbers of the view, in the same order as on the
+        underlying board."""
+        return list(self.board.floors)
+
+    def in_bounds(self, x: int, y: int, z: FloorNumber) -> bool:
+        return z in self.floors and 0 <= x < self.width and 0 <= y < self.height
+
+    @property
+    def indices(self) -> Iterator[tuple[int, int, FloorNumber]]:
+        """All positions of the view, in the same order as
+        Board.indices."""
+        for z in sorted(self.floors):
+            for y in range(self.height):
+                for x in range(self.width):
+                    yield x, y, z
+
+    def get_tile(self, x: int, y: int, z: FloorNumber) -> TileData:
+        """The raw tile data at the given position. Raises IndexError
+        if out of bounds."""
+        if not self.in_bounds(x, y, z):
+            raise IndexError(f"Position {(x, y, z)} out of bounds in view of size {(self.width, self.height)}")
+        return self._tile(x, y, z)
+
+    def get_space(self, x: int, y: int, z: FloorNumber) -> Space:
+        """The space at the given position. Raises IndexError if out of
+        bounds."""
+        return Space(self.get_tile(x, y, z), self.board.tokens, self.board.attributes)
+
+    def rows(self, z: FloorNumber) -> Iterator[list[TileData]]:
+        """The tiles of the given floor, one row at a time."""
+        for y in range(self.height):
+            yield [self._tile(x, y, z) for x in range(self.width)]
+
+    @property
+    def labels_map(self) -> Mapping[str, tuple[int, int, FloorNumber]]:
+        """A mapping from space labels to their coordinates in this
+        view. Computed on each access."""
+        result = {}
+        for x, y, z in self.indices:
+            label = self._tile(x, y, z).space_label
+            if label:
+                result[label] = (x, y, z)
+        return result
+
+    def materialize(self) -> Board:
+        """Copy this view into a new board. The new board shares no
+        mutable state with the underlying board."""
+        board = self.board
+        floor_map = {
+            z: [
+                [
+                    TileData(tile.space_name, list(tile.token_ids), list(tile.attribute_ids), tile.space_label)
+                    for tile in row
+                ]
+                for row in self.rows(z)
+            ]
+            for z in self.floors
+        }
+        return Board(
+            floor_map,
+            dict(board.tokens),
+            dict(board.attributes),
+            dict(board.meta),
+            list(board.graph_edges),
+        )
+
+    def write_back(self, source: Board) -> None:
+        """Copy every tile of source into the corresponding position of
+        the underlying board. source must have the same floors and
+        dimensions as this view, as a board materialized from it does.
+        Tiles at positions added by padding have nowhere to go, and are
+        discarded."""
+        if set(source.floors) != set(self.floors) or (source.width, source.height) != (self.width, self.height):
+            raise ValueError("Board does not have the same shape as the view")
+        for z, floor in source.floors.items():
+            for y, row in enumerate(floor.rows):
+                for x, source_tile in enumerate(row):
+                    tile = self._tile(x, y, z)
+                    tile.space_name = source_tile.space_name
+                    tile.token_ids = list(source_tile.token_ids)
+                    tile.attribute_ids = list(source_tile.attribute_ids)
+                    tile.space_label = source_tile.space_label
+        self.board.recompute_labels_map()
+
+    def mirrored(self) -> BoardView:
+        """A view of this view, mirrored horizontally. Unlike
+        MirrorProcessor, this does not shift tokens which span more
+        than one column."""
+        return _MirroredView(self)
+
+    def offset(self, dx: int, dy: int) -> BoardView:
+        """A view of this view, translated by (dx, dy) and wrapping
+        around at the edges, as on a torus. The space at (x, y) in this
+        view is at (x + dx, y + dy) in the result."""
+        return _OffsetView(self, dx, dy)
+
+    def padded(self, left: int, top: int, right: int, bottom: int, initial_value: str) -> BoardView:
+        """A view of this view with extra space on each side, as with
+        Board.resize. The four integer arguments must be nonnegative.
+        The new positions have the space type initial_value and no
+        tokens or attributes."""
+        if min(left, top, right, bottom) < 0:
+            raise ValueError("Padding must be nonnegative")
+        return _PaddedView(self, left, top, right, bottom, initial_value)
+
+    def cropped(self, left: int, top: int, width: int, height: int) -> BoardView:
+        """A view of the given rectangle of this view, which must lie
+        entirely within it."""
+        if left < 0 or top < 0 or width < 0 or height < 0 or left + width > self.width or top + height > self.height:
+            raise ValueError(f"Rectangle {(left, top, width, height)} out of bounds in view of size "
+                             f"{(self.width, self.height)}")
+        return _CroppedView(self, left, top, width, height)
+
+    def restricted(self, floors: Iterable[FloorNumber]) -> BoardView:
+        """A view of only the given floors of this view, which must all
+        be present in it."""
+        floors = list(floors)
+        missing = [z for z in floors if z not in self.floors]
+        if missing:
+            raise ValueError(f"Floor {missing[0].name} not in view")
+        return _RestrictedView(self, floors)
+
+
+def board_view(board: Board) -> BoardView:
+    """An untransformed view of the board, from which transformed
+    views can be constructed."""
+    return _IdentityView(board)
+
+
+class _IdentityView(BoardView):
+    _board: Board
+
+    def __init__(self, board: Board) -> None:
+        self._board = board
+
+    @property
+    def board(self) -> Board:
+        return self._board
+
+    @property
+    def width(self) -> int:
+        return self._board.width
+
+    @property
+    def height(self) -> int:
+        return self._board.height
+
+    def _tile(self, x: int, y: int, z: FloorNumber) -> TileData:
+        return self._board.floors[z].rows[y][x]
+
+    def rows(self, z: FloorNumber) -> Iterator[list[TileData]]:
+        for row in self._board.floors[z].rows:
+            yield list(row)
+
+
+class _DerivedView(BoardView):
+    """A view which is defined in terms of another view, with the same
+    dimensions unless overridden."""
+    _parent: BoardView
+
+    def __init__(self, parent: BoardView) -> None:
+        self._parent = parent
+
+    @property
+    def board(self) -> Board:
+        return self._parent.board
+
+    @property
+    def width(self) -> int:
+        return self._parent.width
+
+    @property
+    def height(self) -> int:
+        return self._parent.height
+
+    @property
+    def floors(self) -> Sequence[FloorNumber]:
+        return self._parent.floors
+
+
+class _MirroredView(_DerivedView):
+
+    def _tile(self, x: int, y: int, z: FloorNumber) -> TileData:
+        return self._parent._tile(self.width - 1 - x, y, z)
+
+    def rows(self, z: FloorNumber) -> Iterator[list[TileData]]:
+        for row in self._parent.rows(z):
+            row.reverse()
+            yield row
+
+
+class _OffsetView(_DerivedView):
+    _dx: int
+    _dy: int
+
+    def __init__(self, parent: BoardView, dx: int, dy: int) -> None:
+        super().__init__(parent)
+        self._dx = dx
+        self._dy = dy
+
+    def _tile(self, x: int, y: int, z: FloorNumber) -> TileData:
+        return self._parent._tile((x - self._dx) % self.width, (y - self._dy) % self.height, z)
+
+
+class _PaddedView(_DerivedView):
+    _left: int
+    _top: int
+    _right: int
+    _bottom: int
+    _initial_value: str
+
+    def __init__(self, parent: BoardView, left: int, top: int, right: int, bottom: int, initial_value: str) -> None:
+        super().__init__(parent)
+        self._left = left
+        self._top = top
+        self._right = right
+        self._bottom = bottom
+        self._initial_value = initial_value
+
+    @property
+    def width(self) -> int:
+        return self._left + self._parent.width + self._right
+
+    @property
+    def height(self) -> int:
+        return self._top + self._parent.height + self._bottom
+
+    def _tile(self, x: int, y: int, z: FloorNumber) -> TileData:
+        inner_x = x - self._left
+        inner_y = y - self._top
+        if 0 <= inner_x < self._parent.width and 0 <= inner_y < self._parent.height:
+            return self._parent._tile(inner_x, inner_y, z)
+        return TileData(self._initial_value, [], [])
+
+
+class _CroppedView(_DerivedView):
+    _left: int
+    _top: int
+    _width: int
+    _height: int
+
+    def __init__(self, parent: BoardView, left: int, top: int, width: int, height: int) -> None:
+        super().__init__(parent)
+        self._left = left
+        self._top = top
+        self._width = width
+        self._height = height
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    def _tile(self, x: int, y: int, z: FloorNumber) -> TileData:
+        return self._parent._tile(x + self._left, y + self._top, z)
+
+
+class _RestrictedView(_DerivedView):
+    _floors: list[FloorNumber]
+
+    def __init__(self, parent: BoardView, floors: list[FloorNumber]) -> None:
+        super().__init__(parent)
+        # Kept in the same order as the parent's floors.
+        self._floors = [z for z in parent.floors if z in floors]
+
+    @property
+    def floors(self) -> Sequence[FloorNumber]:
+        return self._floors
+
+    def _tile(self, x: int, y: int, z: FloorNumber) -> TileData:
+        return self._parent._tile(x, y, z)
+
+    def rows(self, z: FloorNumber) -> Iterator[list[TileData]]:
+        return self._parent.rows(z)